@@ -1,122 +1,182 @@
+import numpy as np
 import pandas as pd
+from backend.data_model import count_by, index_positions, row_count, value_mask
 
 def calculate_kpis(data):
-    total_ansokningar = len(data)
-    beviljade = data[data['Beslut'] == 'Beviljad']
-    antal_beviljade = len(beviljade)
+    total_ansokningar = row_count(data)
+    beviljad = value_mask(data, 'Beslut', 'Beviljad')
+    antal_beviljade = row_count(data[beviljad])
     godkand_procent = round((antal_beviljade / total_ansokningar * 100), 1) if total_ansokningar > 0 else 0
 
-    total_platser = 0
-    for _, row in beviljade.iterrows():
-        if row['Typ'] == 'Kurs' and 'Totalt antal beviljade platser' in beviljade.columns:
-            platser = row.get('Totalt antal beviljade platser', 0)
-        elif row['Typ'] == 'Program' and 'Beviljade platser totalt' in beviljade.columns:
-            platser = row.get('Beviljade platser totalt', 0)
-        else:
-            platser = 0
-
-        if pd.notna(platser):
-            total_platser += int(platser)
+    total_platser = int(data['platser'].to_numpy()[beviljad].sum())
 
     return total_ansokningar, antal_beviljade, godkand_procent, total_platser
 
-def filter_data(data, year_filter, type_filter, anordnare_filter):
-    filtered = data.copy()
+def build_ranking(data, min_ansokningar=5):
+    totals = count_by(data, 'Anordnare namn')
+    beviljade = count_by(data[value_mask(data, 'Beslut', 'Beviljad')], 'Anordnare namn').reindex(totals.index, fill_value=0)
 
-    if year_filter != "Alla":
-        filtered = filtered[filtered['År'] == int(year_filter)]
+    ranking = pd.DataFrame({
+        'Anordnare': list(totals.index),
+        'Ansökningar': totals.to_numpy(),
+        'Beviljade': beviljade.to_numpy(),
+    })
+    ranking = ranking[ranking['Ansökningar'] >= min_ansokningar]
+    ranking['Godkännandegrad (%)'] = (ranking['Beviljade'] / ranking['Ansökningar'] * 100).round(1)
 
-    if type_filter != "Alla":
-        filtered = filtered[filtered['Typ'] == type_filter]
+    ranking = ranking.sort_values('Godkännandegrad (%)', ascending=False, kind='stable')
+    ranking['Rank'] = np.arange(1, len(ranking) + 1)
 
-    if anordnare_filter != "Alla":
-        filtered = filtered[filtered['Anordnare namn'] == anordnare_filter]
+    # Indexerad på namn så att en anordnares position slås upp i O(1)
+    ranking.index = ranking['Anordnare'].to_numpy()
+    return ranking
+
+def with_godkand_procent(stats):
+    stats['Godkännandegrad (%)'] = (stats['Beviljade'] / stats['Ansökningar'] * 100).round(1)
+    return stats
+
+def area_averages(organizer_areas):
+    return with_godkand_procent(organizer_areas.groupby(level='Utbildningsområde', observed=True)[['Ansökningar', 'Beviljade']].sum())
+
+def build_area_stats(data):
+    # (år, anordnare, område) -> ansökningar/beviljade, plus områdessnitt per år.
+    # Rader utan anordnare räknas med i områdessnitten, precis som i rådata.
+    grouped = data.assign(Beviljade=value_mask(data, 'Beslut', 'Beviljad')).groupby(
+        ['År', 'Anordnare namn', 'Utbildningsområde'], observed=True, dropna=False
+    )
+    per_year = pd.DataFrame({'Ansökningar': grouped.size(), 'Beviljade': grouped['Beviljade'].sum()})
+    per_year = per_year[per_year.index.get_level_values('Utbildningsområde').notna()]
+
+    area_stats = {}
+    for year in per_year.index.get_level_values('År').unique():
+        organizer_areas = per_year.xs(year, level='År')
+        area_stats[str(year)] = (with_godkand_procent(organizer_areas.copy()), area_averages(organizer_areas))
+
+    all_years = per_year.groupby(level=['Anordnare namn', 'Utbildningsområde'], observed=True, dropna=False).sum()
+    area_stats['Alla'] = (with_godkand_procent(all_years), area_averages(all_years))
 
-    return filtered
+    return area_stats
 
-def calculate_examensgrad_all():
-    df_all = pd.read_csv("data/raw/studerande_utbildningsomrade_overtid.csv", encoding='ISO-8859-1')
+def organizer_area_stats(area_stats, anordnare_name):
+    organizer_areas, _ = area_stats
+    try:
+        return organizer_areas.loc[anordnare_name].reset_index()
+    except KeyError:
+        return organizer_areas.iloc[0:0].reset_index(level='Anordnare namn', drop=True).reset_index()
 
-    df_2024 = df_all[
-        (df_all['år'] == 2024) &
-        (df_all['kön'] == 'totalt') &
-        (df_all['ålder'] == 'totalt')
-    ].copy()
+def filter_data(data, year_filter, type_filter, anordnare_filter, index=None):
+    if index is not None:
+        return filter_indexed(data, index, year_filter, type_filter, anordnare_filter)
 
-    aktiva = df_2024[df_2024['tabellinnehåll'] == 'Antal studerande'].set_index('utbildningens inriktning')
-    examinerade = df_2024[df_2024['tabellinnehåll'] == 'Antal examinerade'].set_index('utbildningens inriktning')
+    mask = np.ones(len(data), dtype=bool)
 
-    result = []
-    for omrade in aktiva.index:
-        if omrade == 'Totalt':
-            continue
+    if year_filter != "Alla":
+        mask &= value_mask(data, 'År', year_filter)
+
+    if type_filter != "Alla":
+        mask &= value_mask(data, 'Typ', type_filter)
+
+    if anordnare_filter != "Alla":
+        mask &= value_mask(data, 'Anordnare namn', anordnare_filter)
 
-        if omrade in ['Pedagogik och lärarutbildning', 'Pedagogik och undervisning']:
-            continue
+    return data[mask]
 
-        aktiva_val = aktiva.loc[omrade, 'Studerande och examinerade inom yrkeshögskolan']
-        if isinstance(aktiva_val, pd.Series):
-            aktiva_val = aktiva_val.iloc[0]
+def filter_indexed(data, index, year_filter, type_filter, anordnare_filter):
+    selections = [
+        index_positions(data, index, column, value)
+        for column, value in [('År', year_filter), ('Typ', type_filter), ('Anordnare namn', anordnare_filter)]
+        if value != "Alla"
+    ]
 
-        if omrade in examinerade.index:
-            exam_val = examinerade.loc[omrade, 'Studerande och examinerade inom yrkeshögskolan']
-            if isinstance(exam_val, pd.Series):
-                exam_val = exam_val.iloc[0]
+    if not selections:
+        return data
 
-            if exam_val != '..' and aktiva_val != '..':
-                exam_antal = float(exam_val)
-                aktiva_antal = float(aktiva_val)
+    # Börja med det minsta urvalet så att snittet kostar i storlek med resultatet
+    selections.sort(key=len)
+    positions = selections[0]
+    for other in selections[1:]:
+        positions = np.intersect1d(positions, other, assume_unique=True)
 
-                examensgrad = (exam_antal / aktiva_antal) * 100
+    return data.take(positions)
 
-                result.append({
-                    'Utbildningsområde': omrade,
-                    'Aktiva studenter': int(aktiva_antal),
-                    'Examinerade': int(exam_antal),
-                    'Examensgrad (%)': round(examensgrad, 1)
-                })
+PEDAGOGIK_AREAS = ['Pedagogik och lärarutbildning', 'Pedagogik och undervisning']
 
+def build_examensgrad_matrix(store):
+    aktiva = store.frame('Antal studerande')
+    examinerade = store.frame('Antal examinerade')
+
+    # Pedagogik redovisas under ett namn med lärarutbildningens siffror
     if 'Pedagogik och lärarutbildning' in aktiva.index:
-        ped_aktiva = aktiva.loc['Pedagogik och lärarutbildning', 'Studerande och examinerade inom yrkeshögskolan']
-        if isinstance(ped_aktiva, pd.Series):
-            ped_aktiva = ped_aktiva.iloc[0]
-
-        if 'Pedagogik och lärarutbildning' in examinerade.index:
-            ped_exam = examinerade.loc['Pedagogik och lärarutbildning', 'Studerande och examinerade inom yrkeshögskolan']
-            if isinstance(ped_exam, pd.Series):
-                ped_exam = ped_exam.iloc[0]
-
-            if ped_exam != '..' and ped_aktiva != '..':
-                ped_examensgrad = (float(ped_exam) / float(ped_aktiva)) * 100
-                result.append({
-                    'Utbildningsområde': 'Pedagogik',
-                    'Aktiva studenter': int(float(ped_aktiva)),
-                    'Examinerade': int(float(ped_exam)),
-                    'Examensgrad (%)': round(ped_examensgrad, 1)
-                })
-
-    df_result = pd.DataFrame(result)
+        aktiva.loc['Pedagogik'] = aktiva.loc['Pedagogik och lärarutbildning']
+        examinerade.loc['Pedagogik'] = examinerade.loc['Pedagogik och lärarutbildning']
+
+    examensgrad = (examinerade / aktiva * 100).round(1).replace([np.inf, -np.inf], np.nan)
+    ranked = [omrade for omrade in aktiva.index if omrade != 'Totalt' and omrade not in PEDAGOGIK_AREAS]
+
+    return {
+        'Aktiva studenter': aktiva,
+        'Examinerade': examinerade,
+        'Examensgrad (%)': examensgrad,
+        'ranked': ranked,
+        'tables': {},
+    }
+
+def examensgrad_years(matrix):
+    has_value = matrix['Examensgrad (%)'].loc[matrix['ranked']].notna().any()
+    return [str(year) for year in sorted(has_value[has_value].index, reverse=True)]
+
+def calculate_examensgrad_all(matrix, year=2024):
+    year = int(year)
+    if year in matrix['tables']:
+        return matrix['tables'][year]
+
+    examensgrad = matrix['Examensgrad (%)']
+    if year not in examensgrad.columns:
+        return pd.DataFrame()
+
+    ranked = matrix['ranked']
+    aktiva = matrix['Aktiva studenter'].loc[ranked, year]
+    examinerade = matrix['Examinerade'].loc[ranked, year]
+    valid = (aktiva.notna() & examinerade.notna()).to_numpy()
+
+    df_result = pd.DataFrame({
+        'Utbildningsområde': aktiva.index[valid],
+        'Aktiva studenter': aktiva.to_numpy()[valid].astype(int),
+        'Examinerade': examinerade.to_numpy()[valid].astype(int),
+        'Examensgrad (%)': examensgrad.loc[ranked, year].to_numpy()[valid],
+    })
     df_result = df_result.sort_values('Examensgrad (%)', ascending=False)
 
+    matrix['tables'][year] = df_result
     return df_result
 
-def get_examensgrad_top5():
-    df_all = calculate_examensgrad_all()
+def get_examensgrad_top5(matrix, year=2024, n=5):
+    df_all = calculate_examensgrad_all(matrix, year)
 
     if df_all.empty:
         return pd.DataFrame({'Meddelande': ['Ingen data tillgänglig']})
 
-    return df_all.head(5)
+    return df_all.head(n)
 
-def get_examensgrad_selected(omrade):
-    df_all = calculate_examensgrad_all()
+def get_examensgrad_selected(omrade, matrix, year=2024):
+    examensgrad = matrix['Examensgrad (%)']
+    if omrade not in matrix['ranked'] or int(year) not in examensgrad.columns:
+        return "N/A"
 
-    if df_all.empty:
+    value = examensgrad.at[omrade, int(year)]
+    if pd.isna(value):
         return "N/A"
 
-    row = df_all[df_all['Utbildningsområde'] == omrade]
+    return f"{value}"
 
-    if row.empty:
-        return "N/A"
+def examensgrad_series(store, omrade, kon='totalt', alder='totalt'):
+    aktiva = store.series(omrade, 'Antal studerande', kon, alder)
+    examinerade = store.series(omrade, 'Antal examinerade', kon, alder)
+    examensgrad = (examinerade / aktiva * 100).round(1).replace([np.inf, -np.inf], np.nan)
+    return examensgrad.dropna()
 
-    return f"{row['Examensgrad (%)'].values[0]}"
+def get_examensgrad_trend(matrix, omrade):
+    examensgrad = matrix['Examensgrad (%)']
+    if omrade not in examensgrad.index:
+        return pd.Series(dtype='float64')
+    return examensgrad.loc[omrade].dropna()
@@ -1,36 +1,61 @@
 import pandas as pd
 import plotly.graph_objects as go
-from backend.calculations import calculate_kpis, filter_data, get_examensgrad_selected
-from frontend.charts import *
+from backend.calculations import build_area_stats, build_ranking, calculate_kpis, filter_data, get_examensgrad_selected, get_examensgrad_top5
+from backend.figure_cache import FIGURE_CACHE
+from backend.instrumentation import METRICS, timed_callback
+from backend.storytelling_cache import cached_chart, get_chart
+from taipy.gui import invoke_long_callback
+from frontend.charts import (
+    create_bar_chart, create_beslut_bar_chart, create_comparison_chart, create_examinerade_chart,
+    create_godkannande_comparison_chart, create_latency_chart, create_omrade_jamforelse_chart, create_pie_chart, create_ranking_chart,
+    create_stacked_bar_chart, create_studerande_chart, create_studerande_table, create_styrkor_svagheter_charts, no_data_figure
+)
 from frontend.map_charts import create_map
 
-def update_dashboard(state):
-    filtered_df = filter_data(state.df, state.selected_year, state.selected_type, state.selected_anordnare)
+def apply_results(state, results):
+    for name, value in results.items():
+        setattr(state, name, value)
 
-    filtered_without_anordnare = filter_data(state.df, state.selected_year, state.selected_type, "Alla")
+def compute_dashboard(cube, cube_index, year, typ, anordnare):
+    filtered_df = filter_data(cube, year, typ, anordnare, cube_index)
 
-    state.total_ansokningar, state.antal_beviljade, state.godkand_procent, state.total_platser = calculate_kpis(filtered_df)
+    filtered_without_anordnare = filter_data(cube, year, typ, "Alla", cube_index)
 
-    state.bar_chart = create_bar_chart(filtered_df)
-    state.pie_chart = create_pie_chart(filtered_df)
+    total_ansokningar, antal_beviljade, godkand_procent, total_platser = calculate_kpis(filtered_df)
 
-    state.stacked_bar_chart = create_stacked_bar_chart(filtered_without_anordnare)
-    state.beslut_bar_chart = create_beslut_bar_chart(filtered_without_anordnare)
+    return {
+        'total_ansokningar': total_ansokningar,
+        'antal_beviljade': antal_beviljade,
+        'godkand_procent': godkand_procent,
+        'total_platser': total_platser,
+        'bar_chart': create_bar_chart(filtered_df),
+        'pie_chart': create_pie_chart(filtered_df),
+        'stacked_bar_chart': create_stacked_bar_chart(filtered_without_anordnare),
+        'beslut_bar_chart': create_beslut_bar_chart(filtered_without_anordnare),
+        'map_chart': create_map(filtered_df),
+    }
 
-    state.map_chart = create_map(filtered_df)
+def cached_dashboard(cube, cube_index, year, typ, anordnare):
+    return FIGURE_CACHE.get_or_compute(
+        ('dashboard', year, typ, anordnare),
+        lambda: compute_dashboard(cube, cube_index, year, typ, anordnare)
+    )
 
-def update_anordnare_insights(state):
-    anordnare_name = state.selected_anordnare_insight
-    year_filter = state.selected_year_insight
+@timed_callback
+def update_dashboard(state):
+    apply_results(state, cached_dashboard(state.cube, state.cube_index, state.selected_year, state.selected_type, state.selected_anordnare))
 
-    if anordnare_name == "Alla":
-        state.anordnare_summary_text = "Välj en anordnare för att se insikter"
-        state.anordnare_total_ansokningar = 0
-        state.anordnare_beviljade = 0
-        state.anordnare_godkand_procent = 0
-        state.anordnare_platser = 0
-        state.ranking_text = ""
+def cached_ranking(df, df_index, year_filter):
+    return FIGURE_CACHE.get_or_compute(
+        ('ranking', year_filter),
+        lambda: build_ranking(filter_data(df, year_filter, "Alla", "Alla", df_index))
+    )
+
+def cached_area_stats(df):
+    return FIGURE_CACHE.get_or_compute(('area_stats',), lambda: build_area_stats(df))
 
+def compute_anordnare_insights(df, df_index, anordnare_name, year_filter):
+    if anordnare_name == "Alla":
         empty_fig = go.Figure()
         empty_fig.add_annotation(
             text="Välj en anordnare för att se insikter",
@@ -40,69 +65,149 @@ def update_anordnare_insights(state):
         )
         empty_fig.update_layout(height=400)
 
-        state.godkannande_comparison_chart = empty_fig
-        state.ranking_chart = empty_fig
-        state.styrkor_chart = empty_fig
-        state.svagheter_chart = empty_fig
-        return
+        return {
+            'anordnare_summary_text': "Välj en anordnare för att se insikter",
+            'anordnare_total_ansokningar': 0,
+            'anordnare_beviljade': 0,
+            'anordnare_godkand_procent': 0,
+            'anordnare_platser': 0,
+            'ranking_text': "",
+            'godkannande_comparison_chart': empty_fig,
+            'ranking_chart': empty_fig,
+            'styrkor_chart': empty_fig,
+            'svagheter_chart': empty_fig,
+            'omrade_jamforelse_chart': empty_fig,
+        }
+
+    filtered_data = filter_data(df, year_filter, "Alla", "Alla", df_index)
+    anordnare_data = filter_data(df, year_filter, "Alla", anordnare_name, df_index)
+
+    total_ansokningar, beviljade, godkand_procent, platser = calculate_kpis(anordnare_data)
 
-    if year_filter == "Alla":
-        filtered_data = state.df
-    else:
-        filtered_data = state.df[state.df['År'] == int(year_filter)]
+    year_text = f"under {year_filter}" if year_filter != "Alla" else "totalt (alla år)"
+    summary_text = f"{anordnare_name} har {total_ansokningar} ansökningar {year_text}, varav {beviljade} beviljades ({godkand_procent}%)"
 
-    anordnare_data = filtered_data[filtered_data['Anordnare namn'] == anordnare_name]
+    ranking = cached_ranking(df, df_index, year_filter)
 
-    state.anordnare_total_ansokningar = len(anordnare_data)
-    state.anordnare_beviljade = len(anordnare_data[anordnare_data['Beslut'] == 'Beviljad'])
-    state.anordnare_godkand_procent = round((state.anordnare_beviljade / state.anordnare_total_ansokningar * 100), 1) if state.anordnare_total_ansokningar > 0 else 0
+    if anordnare_name in ranking.index:
+        position = ranking.at[anordnare_name, 'Rank']
+        total_competitors = len(ranking)
+        ranking_text = f"{anordnare_name} rankas #{position} av {total_competitors} anordnare (med minst 5 ansökningar)"
+    else:
+        ranking_text = f"{anordnare_name} har för få ansökningar för att rankas (minst 5 krävs)"
 
-    beviljade = anordnare_data[anordnare_data['Beslut'] == 'Beviljad']
-    total_platser = 0
-    for _, row in beviljade.iterrows():
-        if row['Typ'] == 'Kurs' and 'Totalt antal beviljade platser' in beviljade.columns:
-            platser = row.get('Totalt antal beviljade platser', 0)
-        elif row['Typ'] == 'Program' and 'Beviljade platser totalt' in beviljade.columns:
-            platser = row.get('Beviljade platser totalt', 0)
+    # Ett år utan rader finns inte i områdesstatistiken
+    area_stats = cached_area_stats(df).get(year_filter)
+    if area_stats is None:
+        styrkor_chart = svagheter_chart = omrade_jamforelse_chart = no_data_figure()
+    else:
+        styrkor_chart, svagheter_chart = create_styrkor_svagheter_charts(area_stats, anordnare_name)
+        omrade_jamforelse_chart = create_omrade_jamforelse_chart(area_stats, anordnare_name)
+
+    return {
+        'anordnare_total_ansokningar': total_ansokningar,
+        'anordnare_beviljade': beviljade,
+        'anordnare_godkand_procent': godkand_procent,
+        'anordnare_platser': platser,
+        'anordnare_summary_text': summary_text,
+        'ranking_text': ranking_text,
+        'godkannande_comparison_chart': create_godkannande_comparison_chart(filtered_data, anordnare_name),
+        'ranking_chart': create_ranking_chart(ranking, anordnare_name),
+        'styrkor_chart': styrkor_chart,
+        'svagheter_chart': svagheter_chart,
+        'omrade_jamforelse_chart': omrade_jamforelse_chart,
+    }
+
+def cached_anordnare_insights(df, df_index, anordnare_name, year_filter):
+    return FIGURE_CACHE.get_or_compute(
+        ('anordnare', year_filter, anordnare_name),
+        lambda: compute_anordnare_insights(df, df_index, anordnare_name, year_filter)
+    )
+
+@timed_callback
+def update_anordnare_insights(state):
+    apply_results(state, cached_anordnare_insights(state.df, state.df_index, state.selected_anordnare_insight, state.selected_year_insight))
+
+def compute_studerande(omrade, stud_store, examensgrad_matrix, kon='totalt', alder='totalt'):
+    return {
+        'studerande_chart': create_studerande_chart(omrade, stud_store, kon, alder),
+        'examinerade_chart': create_examinerade_chart(omrade, stud_store, kon, alder),
+        'comparison_chart': create_comparison_chart(omrade, stud_store, examensgrad_matrix, kon, alder),
+        'studerande_table': create_studerande_table(omrade, stud_store, kon, alder),
+    }
+
+def cached_studerande(omrade, stud_store, examensgrad_matrix, kon='totalt', alder='totalt'):
+    return FIGURE_CACHE.get_or_compute(
+        ('studerande', omrade, kon, alder),
+        lambda: compute_studerande(omrade, stud_store, examensgrad_matrix, kon, alder)
+    )
+
+@timed_callback
+def update_studerande(state):
+    apply_results(state, cached_studerande(state.selected_omrade, state.stud_store, state.examensgrad_matrix, state.selected_kon, state.selected_alder))
+    state.examensgrad_selected = get_examensgrad_selected(state.selected_omrade, state.examensgrad_matrix, state.selected_stud_year)
+
+@timed_callback
+def update_examensgrad(state):
+    # Matrisen är redan uträknad, ett årsbyte är bara uppslag
+    state.examensgrad_top5 = get_examensgrad_top5(state.examensgrad_matrix, state.selected_stud_year)
+    state.examensgrad_selected = get_examensgrad_selected(state.selected_omrade, state.examensgrad_matrix, state.selected_stud_year)
+
+def render_story_charts(df, omrade, min_ansokningar):
+    # Körs i en tråd via invoke_long_callback, renderingen sker i egen process
+    results = {'story_status': ""}
+    for name, chart in (('story_trend_image', 'trend'), ('story_geo_image', 'geografi')):
+        try:
+            results[name] = get_chart(df, chart, omrade, min_ansokningar)
+        except ValueError as e:
+            results[name] = None
+            results['story_status'] = str(e)
+    return results
+
+def story_charts_ready(state, status, result=None):
+    if isinstance(status, bool):
+        if status:
+            apply_results(state, result)
         else:
-            platser = 0
+            state.story_status = "Kunde inte rita diagrammen"
 
-        if pd.notna(platser):
-            total_platser += int(platser)
+@timed_callback
+def update_story_charts(state):
+    omrade, min_ansokningar = state.story_omrade, int(state.story_threshold)
 
-    state.anordnare_platser = total_platser
-
-    year_text = f"under {year_filter}" if year_filter != "Alla" else "totalt (alla år)"
-    state.anordnare_summary_text = f"{anordnare_name} har {state.anordnare_total_ansokningar} ansökningar {year_text}, varav {state.anordnare_beviljade} beviljades ({state.anordnare_godkand_procent}%)"
-
-    all_anordnare_stats = []
-    for other_anordnare in filtered_data['Anordnare namn'].unique():
-        if pd.isna(other_anordnare):
-            continue
-        other_data = filtered_data[filtered_data['Anordnare namn'] == other_anordnare]
-        total = len(other_data)
-        if total < 5:
-            continue
-        beviljade = len(other_data[other_data['Beslut'] == 'Beviljad'])
-        godkand = round((beviljade / total * 100), 1) if total > 0 else 0
-        all_anordnare_stats.append({'Anordnare': other_anordnare, 'Godkännandegrad': godkand})
-
-    ranking_df = pd.DataFrame(all_anordnare_stats).sort_values('Godkännandegrad', ascending=False).reset_index(drop=True)
-
-    if anordnare_name in ranking_df['Anordnare'].values:
-        position = ranking_df[ranking_df['Anordnare'] == anordnare_name].index[0] + 1
-        total_competitors = len(ranking_df)
-        state.ranking_text = f"{anordnare_name} rankas #{position} av {total_competitors} anordnare (med minst 5 ansökningar)"
-    else:
-        state.ranking_text = f"{anordnare_name} har för få ansökningar för att rankas (minst 5 krävs)"
-
-    state.godkannande_comparison_chart = create_godkannande_comparison_chart(filtered_data, anordnare_name)
-    state.ranking_chart = create_ranking_chart(filtered_data, anordnare_name)
-    state.styrkor_chart, state.svagheter_chart = create_styrkor_svagheter_charts(filtered_data, anordnare_name)
+    # Redan ritade diagram visas direkt utan bakgrundstråd
+    urls = [cached_chart(state.df, chart, omrade, min_ansokningar) for chart in ('trend', 'geografi')]
+    if all(urls):
+        apply_results(state, {'story_trend_image': urls[0], 'story_geo_image': urls[1], 'story_status': ""})
+        return
 
-def update_studerande(state):
-    state.studerande_chart = create_studerande_chart(state.selected_omrade, state.df_stud_filtered)
-    state.examinerade_chart = create_examinerade_chart(state.selected_omrade)
-    state.comparison_chart = create_comparison_chart(state.selected_omrade)
-    state.studerande_table = create_studerande_table(state.selected_omrade, state.df_stud_filtered)
-    state.examensgrad_selected = get_examensgrad_selected(state.selected_omrade)
+    state.story_status = f"Ritar diagram för {omrade}..."
+    invoke_long_callback(state, render_story_charts, [state.df, omrade, min_ansokningar], story_charts_ready)
+
+def update_prestanda(state):
+    # Mäts inte själv, annars syns sidans egna uppdateringar i tabellen
+    summaries = sorted(METRICS.summaries(), key=lambda summary: (summary['kind'] != 'callback', -summary['p95_ms']))
+    state.prestanda_table = pd.DataFrame([{
+        'Namn': summary['name'],
+        'Typ': 'Callback' if summary['kind'] == 'callback' else 'Diagram',
+        'Anrop': summary['count'],
+        'Medel ms': summary['mean_ms'],
+        'p50 ms': summary['p50_ms'],
+        'p95 ms': summary['p95_ms'],
+        'p99 ms': summary['p99_ms'],
+        'Max ms': summary['max_ms'],
+        'Rader': "–" if summary['rows'] is None else summary['rows'],
+        'Figur kB': round(summary['mean_payload_bytes'] / 1000, 1),
+        'Cacheträffar': summary['cache_hits'],
+        'Cachemissar': summary['cache_misses'],
+    } for summary in summaries])
+
+    names = [summary['name'] for summary in summaries]
+    if state.prestanda_name not in names:
+        state.prestanda_name = names[0] if names else ""
+    state.prestanda_names = names
+    state.prestanda_chart = create_latency_chart(next((summary for summary in summaries if summary['name'] == state.prestanda_name), None))
+
+    stats = FIGURE_CACHE.stats()
+    state.prestanda_cache_text = (f"Figurcache: {stats['hits']} träffar, {stats['misses']} missar ({stats['hit_rate']}%), "
+                                  f"{stats['entries']} poster, {stats['evictions']} utträngda")
@@ -0,0 +1,20 @@
+"""Förberäknad aggregatkub för Översikt-filtren.
+
+Kuben har en rad per kombination av År × Typ × Anordnare × Utbildningsområde
+× Län × Beslut med antal ansökningar ('Antal') och summerade platser. Den har
+samma kategoriska dimensioner som df, så filter_data, calculate_kpis och
+diagramfunktionerna kan ta kuben i stället för rådata.
+"""
+from backend.data_model import memory_mb
+
+CUBE_DIMENSIONS = ['År', 'Typ', 'Anordnare namn', 'Utbildningsområde', 'Län', 'Beslut']
+
+def build_cube(df):
+    grouped = df.groupby(CUBE_DIMENSIONS, observed=True, dropna=False)
+
+    cube = grouped['platser'].sum().to_frame()
+    cube['Antal'] = grouped.size().astype('int32')
+    cube = cube.reset_index()
+
+    print(f"Aggregatkub: {len(df)} ansökningar -> {len(cube)} celler ({memory_mb(cube):.1f} MB)")
+    return cube
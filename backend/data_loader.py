@@ -1,58 +1,185 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from backend import data_model, regions, snapshot, studerande_store
+from backend.figure_cache import FIGURE_CACHE
 
-def load_all_data():
+# Antal processer för parsning av arbetsböcker (1 = seriellt)
+LOAD_WORKERS = int(os.environ.get("YH_LOAD_WORKERS", "1"))
+
+# (år, typ, fil, flik, skiprows) för varje MYH-arbetsbok
+SOURCES = [
+    (2022, 'Kurs', "data/raw/resultat-2022-for-kurser-inom-yh.xlsx", "Lista ansökningar", 0),
+    (2023, 'Kurs', "data/raw/resultat-2023-for-kurser-inom-yh.xlsx", "Lista ansökningar", 0),
+    (2024, 'Kurs', "data/raw/resultat-2024-for-kurser-inom-yh.xlsx", "Lista ansökningar", 0),
+    (2022, 'Program', "data/raw/resultat-ansokningsomgang-2022-ny.xlsx", "Tabell 4", 0),
+    (2023, 'Program', "data/raw/resultat-ansokningsomgang-2023.xlsx", "Tabell 3", 5),
+    (2024, 'Program', "data/raw/resultat-ansokningsomgang-2024.xlsx", "Tabell 3", 5),
+]
+
+# Kolumner som dashboarden använder, per flik: (rubrik i arbetsboken, kolumn i df, typ).
+# Programflikarna saknar 'Anordnare namn' och har i stället den administrativa enheten.
+KURS_COLUMNS = [
+    ('Diarienummer', 'Diarienummer', 'text'),
+    ('Beslut', 'Beslut', 'text'),
+    ('Anordnare namn', 'Anordnare namn', 'text'),
+    ('Utbildningsnamn', 'Utbildningsnamn', 'text'),
+    ('Utbildningsområde', 'Utbildningsområde', 'text'),
+    ('Totalt antal beviljade platser', 'Totalt antal beviljade platser', 'number'),
+    ('Kommun', 'Kommun', 'text'),
+    ('Län', 'Län', 'text'),
+]
+
+PROGRAM_COLUMNS = [
+    ('Diarienummer', 'Diarienummer', 'text'),
+    ('Beslut', 'Beslut', 'text'),
+    ('Utbildningsanordnare administrativ enhet', 'Anordnare namn', 'text'),
+    ('Utbildningsnamn', 'Utbildningsnamn', 'text'),
+    ('Utbildningsområde', 'Utbildningsområde', 'text'),
+    ('Beviljade platser totalt', 'Beviljade platser totalt', 'number'),
+    ('Kommun', 'Kommun', 'text'),
+    ('Län', 'Län', 'text'),
+]
+
+SHEET_SCHEMAS = {
+    "Lista ansökningar": KURS_COLUMNS,
+    "Tabell 3": PROGRAM_COLUMNS,
+    "Tabell 4": PROGRAM_COLUMNS,
+}
+
+def read_sheet(path, sheet_name, skiprows, schema):
+    # openpyxl behövs bara när en arbetsbok saknas i snapshoten
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        rows = workbook[sheet_name].iter_rows(min_row=skiprows + 1, values_only=True)
+        header = list(next(rows))
+
+        missing = [title for title, _, _ in schema if title not in header]
+        if missing:
+            raise ValueError(f"kolumner saknas i {sheet_name}: {', '.join(missing)}")
+
+        positions = [header.index(title) for title, _, _ in schema]
+        columns = [[] for _ in schema]
+        for row in rows:
+            for values, pos in zip(columns, positions):
+                values.append(row[pos] if pos < len(row) else None)
+    finally:
+        workbook.close()
+
+    # Läsläget kan ge tomma rader i slutet av fliken
+    n_rows = len(columns[0])
+    while n_rows > 0 and all(values[n_rows - 1] is None for values in columns):
+        n_rows -= 1
+
+    data = {}
+    for (_, name, kind), values in zip(schema, columns):
+        values = values[:n_rows]
+        if kind == 'number':
+            data[name] = pd.to_numeric(pd.Series(values, dtype=object))
+        else:
+            data[name] = pd.Series([np.nan if v is None else v for v in values], dtype=object)
+
+    return pd.DataFrame(data)
+
+def load_source(year, typ, path, sheet_name, skiprows):
+    df = read_sheet(path, sheet_name, skiprows, SHEET_SCHEMAS[sheet_name])
+    df['Typ'] = typ
+    df['År'] = year
+    return df
+
+def add_platser(df):
+    # Kurser och program redovisar beviljade platser i olika kolumner
+    kurs_platser = df.get('Totalt antal beviljade platser', pd.Series(np.nan, index=df.index))
+    program_platser = df.get('Beviljade platser totalt', pd.Series(np.nan, index=df.index))
+
+    platser = kurs_platser.where(df['Typ'] == 'Kurs', program_platser)
+    df['platser'] = platser.fillna(0).astype('int32')
+    return df
+
+def timed_load_source(source):
+    start = time.perf_counter()
+    df = load_source(*source)
+    return df, time.perf_counter() - start
+
+def parse_sources(sources, workers):
+    results = {}
+
+    if workers > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sources))) as pool:
+            futures = {source: pool.submit(timed_load_source, source) for source in sources}
+            for source, future in futures.items():
+                try:
+                    results[source] = future.result()
+                except Exception as e:
+                    results[source] = e
+    else:
+        for source in sources:
+            try:
+                results[source] = timed_load_source(source)
+            except Exception as e:
+                results[source] = e
+
+    return results
+
+def load_all_data(use_snapshot=True, workers=None):
+    workers = LOAD_WORKERS if workers is None else workers
+
+    cached = {}
+    if use_snapshot:
+        for source in SOURCES:
+            df = snapshot.load(source, SHEET_SCHEMAS[source[3]])
+            if df is not None:
+                cached[source] = df
+
+    pending = [source for source in SOURCES if source not in cached]
+    parsed = parse_sources(pending, workers)
+
+    # Slå ihop i SOURCES-ordning så att resultatet inte beror på antal processer
     all_dfs = []
+    for source in SOURCES:
+        year, typ, path = source[0], source[1], source[2]
+
+        if source in cached:
+            all_dfs.append(cached[source])
+            continue
 
-    for year in [2022, 2023, 2024]:
-        try:
-            df = pd.read_excel(
-                f"data/raw/resultat-{year}-for-kurser-inom-yh.xlsx",
-                sheet_name="Lista ansökningar"
-            )
-            df['Typ'] = 'Kurs'
-            df['År'] = year
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"Fel vid laddning av kurser {year}: {e}")
-
-    for year in [2022, 2023, 2024]:
-        try:
-            if year == 2022:
-                df = pd.read_excel(
-                    f"data/raw/resultat-ansokningsomgang-{year}-ny.xlsx",
-                    sheet_name="Tabell 4"
-                )
-            else:
-                df = pd.read_excel(
-                    f"data/raw/resultat-ansokningsomgang-{year}.xlsx",
-                    sheet_name="Tabell 3",
-                    skiprows=5
-                )
-
-            if 'Utbildningsanordnare administrativ enhet' in df.columns:
-                df['Anordnare namn'] = df['Utbildningsanordnare administrativ enhet']
-
-            df['Typ'] = 'Program'
-            df['År'] = year
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"Fel vid laddning av program {year}: {e}")
+        result = parsed[source]
+        if isinstance(result, Exception):
+            print(f"Fel vid laddning av {'kurser' if typ == 'Kurs' else 'program'} {year}: {result}")
+            continue
+
+        df, elapsed = result
+        print(f"Läste {path} på {elapsed:.2f} s ({len(df)} rader)")
+
+        if use_snapshot:
+            snapshot.store(source, df, SHEET_SCHEMAS[source[3]])
+        all_dfs.append(df)
 
     combined = pd.concat(all_dfs, ignore_index=True)
+    combined = add_platser(combined)
+
+    # Ny data - figurer beräknade på den gamla får inte återanvändas
+    FIGURE_CACHE.reset(snapshot.data_version())
+    combined = data_model.normalize(combined)
+    regions.build_county_aliases(combined)
     return combined
 
 def load_studerande_data():
     try:
-        df_stud = pd.read_csv("data/raw/studerande_utbildningsomrade_overtid.csv", encoding='ISO-8859-1')
+        df_stud = studerande_store.read_studerande()
 
-        df_stud_filtered = df_stud[
+        totalt = df_stud[
             (df_stud['kön'] == 'totalt') &
             (df_stud['tabellinnehåll'] == 'Antal studerande') &
             (df_stud['ålder'] == 'totalt')
-        ].copy()
+        ]
 
-        omrade_list = sorted([x for x in df_stud_filtered['utbildningens inriktning'].unique() if x != 'Totalt'])
-        return df_stud_filtered, omrade_list
+        omrade_list = sorted([x for x in totalt['utbildningens inriktning'].unique() if x != 'Totalt'])
+        return studerande_store.build_store(df_stud), omrade_list
     except Exception as e:
         print(f"Kunde inte ladda studerande-data: {e}")
-        return pd.DataFrame(), ["Data/It"]
+        return studerande_store.empty_store(), ["Data/It"]
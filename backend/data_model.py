@@ -0,0 +1,82 @@
+"""Kompakt datamodell för ansökningsdatan.
+
+Dimensionskolumnerna lagras som pandas-kategorier: varje kolumn får en
+dimensionstabell (kategorierna) och raderna bär bara små heltalskoder.
+Filtrering och gruppering kan då göras direkt på koderna.
+"""
+import numpy as np
+
+DIMENSIONS = ['Typ', 'Beslut', 'Län', 'Utbildningsområde', 'Anordnare namn']
+INDEX_DIMENSIONS = ['År', 'Typ', 'Anordnare namn']
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def normalize(df):
+    before = memory_mb(df)
+
+    for column in DIMENSIONS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    df['År'] = df['År'].astype('int16')
+
+    print(f"Datamodell: {before:.1f} MB -> {memory_mb(df):.1f} MB")
+    return df
+
+def dimension_table(df, column):
+    return df[column].cat.categories
+
+def code_of(df, column, value):
+    categories = dimension_table(df, column)
+    return categories.get_loc(value) if value in categories else -1
+
+def codes(df, column):
+    return df[column].cat.codes.to_numpy()
+
+def row_count(data):
+    # Kubrader bär antalet ansökningar i 'Antal', rådata har en rad per ansökan
+    if 'Antal' in data.columns:
+        return int(data['Antal'].sum())
+    return len(data)
+
+def count_by(data, by):
+    grouped = data.groupby(by, observed=True)
+    if 'Antal' in data.columns:
+        return grouped['Antal'].sum()
+    return grouped.size()
+
+def value_mask(df, column, value):
+    if column == 'År':
+        return df['År'].to_numpy() == int(value)
+
+    code = code_of(df, column, value)
+    if code < 0:
+        return np.zeros(len(df), dtype=bool)
+    return codes(df, column) == code
+
+def dimension_keys(df, column):
+    if column == 'År':
+        return df['År'].to_numpy()
+    return codes(df, column)
+
+def build_position_index(df):
+    # Per dimension: värde/kod -> sorterade radpositioner
+    index = {}
+    for column in INDEX_DIMENSIONS:
+        keys = dimension_keys(df, column)
+        order = np.argsort(keys, kind='stable').astype(np.int32)
+        values, starts = np.unique(keys[order], return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        # Kod -1 är NaN, de raderna kan inget filtervärde välja
+        index[column] = {
+            value.item(): order[start:end] for value, start, end in zip(values, starts, ends)
+            if column == 'År' or value >= 0
+        }
+    return index
+
+def index_positions(df, index, column, value):
+    key = int(value) if column == 'År' else code_of(df, column, value)
+    if column != 'År' and key < 0:
+        return np.empty(0, dtype=np.int32)
+    return index[column].get(key, np.empty(0, dtype=np.int32))
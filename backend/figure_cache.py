@@ -0,0 +1,81 @@
+"""Processgemensam LRU-cache för figurer och nyckeltal från callbacks.
+
+Alla Taipy-sessioner som väljer samma filter delar på samma resultat. Nycklar
+är filtertupeln plus datasetets version, och cachen töms när datan laddas om.
+Storleken begränsas av antal poster och valfritt av antal bytes (mätt som
+figurernas JSON-storlek).
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from backend.instrumentation import note_cache, payload_bytes
+
+class FigureCache:
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def reset(self, version):
+        with self._lock:
+            self.version = version
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_or_compute(self, key, compute):
+        key = (self.version,) + tuple(key)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                note_cache(True)
+                return self._entries[key][0]
+            self.misses += 1
+        note_cache(False)
+
+        value = compute()
+        size = payload_bytes(value) if self.max_bytes else 0
+
+        with self._lock:
+            # Datan kan ha laddats om medan värdet räknades fram
+            if key[0] != self.version or key in self._entries:
+                return value
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes)):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return (self.version,) + tuple(key) in self._entries
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+            }
+
+FIGURE_CACHE = FigureCache(
+    max_entries=int(os.environ.get("YH_FIGURE_CACHE_ENTRIES", "256")),
+    max_bytes=int(float(os.environ.get("YH_FIGURE_CACHE_MB", "0")) * 1e6) or None,
+)
@@ -0,0 +1,108 @@
+"""Importtider vid start, sammanfattade per paket och modul.
+
+Kör `python -X importtime -c "import main"` i en egen process och läser
+rapporten som Python skriver till stderr. main räknas separat: dess egen tid
+är modulkoden (inläsning, kub, platshållare), inte importer. Tunga paket som
+inte ska laddas vid start listas med ja/nej.
+
+    python -m backend.importtime                  # main, de 15 dyraste modulerna
+    python -m backend.importtime frontend.charts --top 30
+    python -m backend.importtime --budget 1500    # fel om importerna tar över 1.5 s
+    python -m backend.importtime --json data/cache/importtime.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Ska bara laddas när en figur eller arbetsbok behöver dem
+DEFERRED = ["plotly.express", "matplotlib", "seaborn", "openpyxl"]
+
+def parse_importtime(text):
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+def measure(module="main"):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} misslyckades:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def summarize(rows, module="main", top=15):
+    target = next((row for row in reversed(rows) if row["module"] == module), None)
+    imports = [row for row in rows if row is not target]
+
+    packages = defaultdict(float)
+    for row in imports:
+        packages[row["module"].split(".")[0]] += row["self_ms"]
+
+    # Ett paket kan stå två gånger (__init__ och en undermodul), behåll den största tiden
+    loaded = {}
+    for row in imports:
+        loaded[row["module"]] = max(loaded.get(row["module"], 0), row["cumulative_ms"])
+    return {
+        "module": module,
+        "imports_ms": round(sum(row["self_ms"] for row in imports), 1),
+        "module_code_ms": round(target["self_ms"], 1) if target else 0.0,
+        "modules": len(imports),
+        "packages": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        "slowest": [
+            {"module": name, "cumulative_ms": round(ms, 1)}
+            for name, ms in sorted(loaded.items(), key=lambda item: -item[1])[:top]
+        ],
+        "deferred": {name: round(loaded[name], 1) if name in loaded else None for name in DEFERRED},
+    }
+
+def print_report(summary):
+    print(f"import {summary['module']}: {summary['imports_ms']:.0f} ms importer ({summary['modules']} moduler), "
+          f"{summary['module_code_ms']:.0f} ms egen modulkod")
+
+    print("\nPer paket (egen tid)")
+    for name, ms in summary["packages"].items():
+        print(f"  {name:<32} {ms:>8.1f} ms")
+
+    print("\nDyraste modulerna (inklusive underimporter)")
+    for row in summary["slowest"]:
+        print(f"  {row['module']:<32} {row['cumulative_ms']:>8.1f} ms")
+
+    print("\nUppskjutna vid start")
+    for name, ms in summary["deferred"].items():
+        print(f"  {name:<32} {'nej' if ms is None else f'ja, {ms:.1f} ms'}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importtider vid start")
+    parser.add_argument("module", nargs="?", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget", type=float, help="högsta tillåtna importtid i ms")
+    parser.add_argument("--json", type=Path, help="spara sammanfattningen som JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize(measure(args.module), args.module, args.top)
+    print_report(summary)
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.budget is not None and summary["imports_ms"] > args.budget:
+        print(f"\nÖver budget: {summary['imports_ms']:.0f} ms > {args.budget:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
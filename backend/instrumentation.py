@@ -0,0 +1,234 @@
+"""Tidmätning av callbacks och diagrambyggare med structlog.
+
+@timed_callback och @timed_builder mäter varje anrop: tid, antal rader i
+indata, figurernas JSON-storlek och träffar/missar i figurcachen. En
+callback summerar byggarna och cacheuppslagen som körs inuti den (samma
+tråd). Tiderna samlas i histogram i minnet som visas på sidan Prestanda och
+kan hämtas som JSON från /prestanda.json.
+
+YH_METRICS=0 stänger av mätningen helt. YH_METRICS_LOG styr structlogs nivå:
+callbacks loggas som info, byggare som debug (standard "info").
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from functools import wraps
+from pathlib import Path
+
+import structlog
+
+ENABLED = os.environ.get("YH_METRICS", "1") != "0"
+RECENT_EVENTS = int(os.environ.get("YH_METRICS_RECENT", "1000"))
+
+# Övre gränser i ms, sista facket tar resten
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+def payload_bytes(value, seen=None):
+    # Samma figur kan förekomma flera gånger (t.ex. styrkor och svagheter utan data), räkna den en gång
+    seen = set() if seen is None else seen
+    if hasattr(value, "to_json"):
+        if id(value) in seen:
+            return 0
+        seen.add(id(value))
+        return len(value.to_json())
+    if isinstance(value, dict):
+        return sum(payload_bytes(v, seen) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_bytes(v, seen) for v in value)
+    return sys.getsizeof(value)
+
+def add_rows(total, rows):
+    return total if rows is None else (total or 0) + rows
+
+def frame_rows(args):
+    # Rader i de DataFrames som byggaren får, även i tupler som area_stats.
+    # None när inget är en DataFrame (t.ex. studerande-lagret), inte 0.
+    rows = None
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            rows = add_rows(rows, frame_rows(arg))
+        elif hasattr(arg, "columns") and hasattr(arg, "__len__"):
+            rows = add_rows(rows, len(arg))
+    return rows
+
+def make_logger(level):
+    return structlog.wrap_logger(
+        structlog.PrintLogger(),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="%H:%M:%S"),
+            structlog.processors.KeyValueRenderer(key_order=["timestamp", "level", "event", "name", "ms"]),
+        ],
+    )
+
+LOG = make_logger(os.environ.get("YH_METRICS_LOG", "info"))
+
+def set_log_level(level):
+    global LOG
+    LOG = make_logger(level)
+
+class LatencyHistogram:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = None
+        self.payload_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def add(self, ms, rows, payload, hits, misses):
+        bucket = next((i for i, limit in enumerate(BUCKETS_MS) if ms <= limit), len(BUCKETS_MS))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows = add_rows(self.rows, rows)
+        self.payload_bytes += payload
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+    def percentile(self, q):
+        # Facket där andelen q nås; övre gränsen, men aldrig över största mätningen
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for limit, n in zip(BUCKETS_MS + (self.max_ms,), self.counts):
+            seen += n
+            if seen >= target:
+                return min(limit, self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        count = self.count or 1
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "count": self.count,
+            "mean_ms": round(self.total_ms / count, 1),
+            "p50_ms": round(self.percentile(0.5), 1),
+            "p95_ms": round(self.percentile(0.95), 1),
+            "p99_ms": round(self.percentile(0.99), 1),
+            "max_ms": round(self.max_ms, 1),
+            "rows": self.rows,
+            "mean_payload_bytes": round(self.payload_bytes / count),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "buckets_ms": list(BUCKETS_MS),
+            "counts": list(self.counts),
+        }
+
+class Metrics:
+    def __init__(self, recent=RECENT_EVENTS):
+        self.started = time.time()
+        self._histograms = {}
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def record(self, name, kind, ms, rows=None, payload=0, hits=0, misses=0):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(name, kind)
+            histogram.add(ms, rows, payload, hits, misses)
+            self._recent.append({
+                "time": round(time.time(), 3), "name": name, "kind": kind, "ms": round(ms, 2),
+                "rows": rows, "payload_bytes": payload, "cache_hits": hits, "cache_misses": misses,
+            })
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._histograms.clear()
+            self._recent.clear()
+
+    def summaries(self):
+        with self._lock:
+            return [histogram.summary() for histogram in self._histograms.values()]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "histograms": [histogram.summary() for histogram in self._histograms.values()],
+                "recent": list(self._recent),
+            }
+
+    def dump(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(), indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+METRICS = Metrics()
+
+# Pågående mätningar per tråd, innersta sist
+_local = threading.local()
+
+def _spans():
+    if not hasattr(_local, "spans"):
+        _local.spans = []
+    return _local.spans
+
+def note_cache(hit):
+    # Anropas av figurcachen, räknas på den pågående mätningen om det finns någon
+    spans = _spans()
+    if spans:
+        spans[-1]["hits" if hit else "misses"] += 1
+
+def measure(name, kind, function, args, kwargs):
+    spans = _spans()
+    span = {"rows": None, "payload": 0, "hits": 0, "misses": 0}
+    spans.append(span)
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    except Exception as e:
+        LOG.warning(f"{kind} misslyckades", name=name, error=str(e))
+        raise
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        spans.pop()
+
+    if kind == "builder":
+        span["rows"] = add_rows(span["rows"], frame_rows(list(args) + list(kwargs.values())))
+        span["payload"] += payload_bytes(result)
+    if spans:
+        parent = spans[-1]
+        parent["rows"] = add_rows(parent["rows"], span["rows"])
+        for key in ("payload", "hits", "misses"):
+            parent[key] += span[key]
+
+    METRICS.record(name, kind, ms, span["rows"], span["payload"], span["hits"], span["misses"])
+    log = LOG.info if kind == "callback" else LOG.debug
+    log(kind, name=name, ms=round(ms, 1), rows=span["rows"], payload_bytes=span["payload"],
+        cache_hits=span["hits"], cache_misses=span["misses"])
+    return result
+
+def timed_builder(function):
+    if not ENABLED:
+        return function
+
+    @wraps(function)
+    def builder(*args, **kwargs):
+        return measure(function.__name__, "builder", function, args, kwargs)
+    return builder
+
+def timed_callback(function):
+    # Taipy läser antalet parametrar från __code__, så omslaget måste ta exakt (state)
+    if not ENABLED:
+        return function
+
+    @wraps(function)
+    def callback(state):
+        return measure(function.__name__, "callback", function, (state,), {})
+    return callback
@@ -0,0 +1,23 @@
+"""Manifestfiler i JSON som skrivs atomiskt.
+
+Snapshoten, storytelling-diagrammen och webbversionerna av bilderna håller
+var sin manifest.json. En avbruten skrivning får inte lämna en halv fil, så
+innehållet skrivs till en .tmp-fil som sedan byter namn.
+"""
+import json
+import os
+
+def read_json(path, default):
+    # En saknad eller trasig fil ger standardvärdet, då byggs allt om
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
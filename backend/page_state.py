@@ -0,0 +1,87 @@
+"""Sidornas figurer räknas fram först när sidan öppnas.
+
+main.py startar med billiga platshållare. on_navigate() fyller en sidas
+figurer första gången en session öppnar den, i en bakgrundstråd så att
+sidan visas direkt. Figurerna hämtas ur figurcachen, som förvärms så snart
+servern svarar. Tiden från start till första svar och första sida loggas.
+"""
+import threading
+import time
+
+from taipy.gui import invoke_long_callback
+
+from backend.callbacks import apply_results, cached_dashboard, cached_studerande, update_prestanda
+
+class ServeTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_page = None
+        self._lock = threading.Lock()
+
+    def start(self, started):
+        self.started = started
+
+    def since_start(self):
+        return time.perf_counter() - self.started
+
+    def page_served(self, page_name):
+        with self._lock:
+            if self.first_page is not None:
+                return
+            self.first_page = self.since_start()
+        print(f"Första sidan ({page_name}) skickad {self.first_page:.2f} s efter start")
+
+SERVE_TIMER = ServeTimer()
+
+DASHBOARD_FILTERS = ("selected_year", "selected_type", "selected_anordnare")
+STUDERANDE_FILTERS = ("selected_omrade", "selected_kon", "selected_alder")
+
+def dashboard_job(state):
+    return cached_dashboard, [state.cube, state.cube_index, state.selected_year, state.selected_type, state.selected_anordnare]
+
+def studerande_job(state):
+    return cached_studerande, [state.selected_omrade, state.stud_store, state.examensgrad_matrix, state.selected_kon, state.selected_alder]
+
+# Sida -> (funktion som ger beräkning och argument, filtren den läser).
+# Anordnare och Storytelling har inget att räkna innan ett val görs.
+PAGE_JOBS = {
+    "Översikt": (dashboard_job, DASHBOARD_FILTERS),
+    "Karta": (dashboard_job, DASHBOARD_FILTERS),
+    "Studenttrender": (studerande_job, STUDERANDE_FILTERS),
+}
+
+# Sidor som läses om vid varje besök, det är billigt
+PAGE_REFRESH = {
+    "Prestanda": update_prestanda,
+}
+
+def current_filters(state, names):
+    return [getattr(state, name) for name in names]
+
+def page_loaded(state, status, names, filters, result=None):
+    # Har användaren hunnit ändra ett filter har callbacken redan satt nyare
+    # figurer, då kastas resultatet från sidladdningen
+    if isinstance(status, bool) and status and current_filters(state, names) == filters:
+        apply_results(state, result)
+
+def on_navigate(state, page_name):
+    SERVE_TIMER.page_served(page_name)
+
+    job, names = PAGE_JOBS.get(page_name, (None, None))
+    if job is not None and page_name not in state.loaded_pages:
+        state.loaded_pages = state.loaded_pages + [page_name]
+        function, args = job(state)
+        invoke_long_callback(state, function, args, page_loaded, [names, current_filters(state, names)])
+
+    refresh = PAGE_REFRESH.get(page_name)
+    if refresh is not None:
+        refresh(state)
+
+    return page_name
+
+def first_page_jobs(cube, cube_index, omrade, stud_store, examensgrad_matrix):
+    # Startsidornas standardval, så att första besöket träffar cachen
+    return [
+        lambda: cached_dashboard(cube, cube_index, "Alla", "Alla", "Alla"),
+        lambda: cached_studerande(omrade, stud_store, examensgrad_matrix),
+    ]
@@ -0,0 +1,69 @@
+"""Länsgeometrin och aliastabellen från länsnamnen till 'ref:se:länskod'.
+
+Geometrin läses en gång härifrån, både av inläsningen och av kartan i
+frontend/geometry.py. Aliastabellen byggs vid inläsningen; kartan slår sedan
+upp länen via kategorikoderna i stället för att matcha namn vid varje rendering.
+"""
+import json
+from difflib import get_close_matches
+from functools import lru_cache
+
+import numpy as np
+
+GEOJSON_PATH = "assets/swedish_regions.geojson"
+
+COUNTY_ALIASES = {}
+
+@lru_cache(maxsize=1)
+def load_full_geojson():
+    with open(GEOJSON_PATH, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def region_codes():
+    return {
+        feature["properties"]["name"]: feature["properties"]["ref:se:länskod"]
+        for feature in load_full_geojson()["features"]
+    }
+
+def resolve_county(name, codes):
+    if name in codes:
+        return codes[name]
+    for candidate in (f"{name} län", f"{name}s län"):
+        if candidate in codes:
+            return codes[candidate]
+    matches = get_close_matches(name, codes.keys(), n=1, cutoff=0.6)
+    return codes[matches[0]] if matches else None
+
+def build_county_aliases(df):
+    codes = region_codes()
+    aliases = {}
+    unmatched = []
+
+    for name in df['Län'].cat.categories:
+        code = resolve_county(name, codes)
+        if code is None:
+            unmatched.append(name)
+        else:
+            aliases[name] = code
+
+    if unmatched:
+        counts = df['Län'].value_counts()
+        listed = ", ".join(f"{name} ({counts[name]} rader)" for name in unmatched)
+        print(f"Län utan länskod: {listed}")
+
+    COUNTY_ALIASES.clear()
+    COUNTY_ALIASES.update(aliases)
+    cached_lookup.cache_clear()
+    return aliases
+
+def county_lookup(categories, county_codes):
+    return cached_lookup(tuple(categories), tuple(county_codes))
+
+@lru_cache(maxsize=8)
+def cached_lookup(categories, county_codes):
+    # Kategorikod -> position i county_codes, -1 för län utan länskod
+    position = {code: i for i, code in enumerate(county_codes)}
+    return np.array(
+        [position.get(COUNTY_ALIASES.get(name), -1) for name in categories],
+        dtype=np.int16
+    )
@@ -0,0 +1,176 @@
+"""Parquet-snapshot av de inlästa MYH-arbetsböckerna.
+
+Varje arbetsbok sparas som en egen Parquet-fil under data/cache/snapshot och
+registreras i manifest.json med filens storlek, mtime och SHA-256. Vid nästa
+start läses Parquet-filen i stället för Excel-filen så länge källan är
+oförändrad, så bara en ändrad eller ny arbetsbok behöver parsas om.
+
+    python -m backend.snapshot info
+    python -m backend.snapshot rebuild
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from backend.manifest import read_json, write_json
+
+SNAPSHOT_DIR = Path("data/cache/snapshot")
+MANIFEST_PATH = SNAPSHOT_DIR / "manifest.json"
+FORMAT_VERSION = 1
+
+_warned_missing_engine = False
+
+def is_available():
+    global _warned_missing_engine
+
+    if importlib.util.find_spec("pyarrow") is not None:
+        return True
+
+    if not _warned_missing_engine:
+        print("pyarrow saknas - snapshot avstängd, arbetsböckerna läses från Excel")
+        _warned_missing_engine = True
+    return False
+
+def source_key(source):
+    year, typ = source[0], source[1]
+    return f"{year}-{typ.lower()}"
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_manifest():
+    manifest = read_json(MANIFEST_PATH, None)
+    if not isinstance(manifest, dict) or manifest.get("format") != FORMAT_VERSION:
+        return {"format": FORMAT_VERSION, "sources": {}}
+    return manifest
+
+def write_manifest(manifest):
+    write_json(MANIFEST_PATH, manifest)
+
+def schema_key(schema):
+    return [list(column) for column in schema]
+
+def is_fresh(entry, source, schema):
+    year, typ, path, sheet_name, skiprows = source
+    if entry is None or entry.get("sheet_name") != sheet_name or entry.get("skiprows") != skiprows:
+        return False
+    if entry.get("schema") != schema_key(schema):
+        return False
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+
+    if stat.st_size != entry.get("size"):
+        return False
+    if stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+
+    # Samma storlek men ny mtime (t.ex. efter git checkout) - jämför innehållet
+    return file_hash(path) == entry.get("sha256")
+
+def load(source, schema):
+    if not is_available():
+        return None
+
+    key = source_key(source)
+    manifest = read_manifest()
+    entry = manifest["sources"].get(key)
+
+    if not is_fresh(entry, source, schema):
+        return None
+
+    try:
+        return pd.read_parquet(SNAPSHOT_DIR / entry["file"])
+    except Exception as e:
+        print(f"Kunde inte läsa snapshot {key}: {e}")
+        return None
+
+def store(source, df, schema):
+    if not is_available():
+        return
+
+    year, typ, path, sheet_name, skiprows = source
+    key = source_key(source)
+    file_name = f"{key}.parquet"
+
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(SNAPSHOT_DIR / file_name, index=False)
+    except Exception as e:
+        print(f"Kunde inte spara snapshot {key}: {e}")
+        return
+
+    stat = os.stat(path)
+    manifest = read_manifest()
+    manifest["sources"][key] = {
+        "path": path,
+        "sheet_name": sheet_name,
+        "skiprows": skiprows,
+        "schema": schema_key(schema),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(path),
+        "file": file_name,
+        "rows": len(df),
+    }
+    write_manifest(manifest)
+
+def data_version():
+    manifest = read_manifest()
+    digest = hashlib.sha256()
+    for key in sorted(manifest["sources"]):
+        digest.update(f"{key}:{manifest['sources'][key]['sha256']}".encode())
+    return digest.hexdigest()[:12]
+
+def clear():
+    manifest = read_manifest()
+    for entry in manifest["sources"].values():
+        (SNAPSHOT_DIR / entry["file"]).unlink(missing_ok=True)
+    MANIFEST_PATH.unlink(missing_ok=True)
+
+def print_info():
+    from backend.data_loader import SHEET_SCHEMAS, SOURCES
+
+    manifest = read_manifest()
+    print(f"Snapshot: {SNAPSHOT_DIR} (version {data_version()})")
+    for source in SOURCES:
+        key = source_key(source)
+        entry = manifest["sources"].get(key)
+        if entry is None:
+            status = "saknas"
+        elif is_fresh(entry, source, SHEET_SCHEMAS[source[3]]):
+            status = f"aktuell, {entry['rows']} rader"
+        else:
+            status = "inaktuell"
+        print(f"   - {key:<14} {source[2]}: {status}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend.snapshot", description="Hantera Parquet-snapshot av MYH-data")
+    parser.add_argument("command", choices=["info", "rebuild", "clear"])
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        print_info()
+    elif args.command == "clear":
+        clear()
+        print("Snapshot borttagen")
+    else:
+        from backend.data_loader import load_all_data
+
+        clear()
+        df = load_all_data()
+        print(f"Snapshot återskapad: {len(df)} ansökningar")
+        print_info()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Webbversioner av storytelling-bilderna.
+
+Varje 300-dpi-PNG i outputs/ skalas ned till några bredder och sparas både
+som WebP och som optimerad PNG (reserv för äldre webbläsare). Bilderna
+kvantiseras till 256 färger, vilket diagrammen klarar utan synlig skillnad,
+och båda formaten får därmed samma pixlar. Filnamnen innehåller en hash av
+innehållet, så de kan cachas för alltid. manifest.json talar om för
+storytelling-sidan vilka filer som finns.
+
+    python -m backend.storytelling_assets    # bygg om och visa sidvikten
+"""
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from backend.manifest import read_json, write_json
+
+SOURCE_DIR = Path("outputs")
+WEB_DIR = Path("outputs/web")
+MANIFEST_PATH = WEB_DIR / "manifest.json"
+URL_PREFIX = "story"
+WIDTHS = [640, 1280, 1920]
+DEFAULT_WIDTH = 1280
+SIZES = "(max-width: 1400px) 100vw, 1400px"
+
+def content_name(stem, width, data, suffix):
+    return f"{stem}-{width}w-{hashlib.sha256(data).hexdigest()[:10]}.{suffix}"
+
+def encode(image, format):
+    buffer = BytesIO()
+    if format == "webp":
+        image.save(buffer, format="WEBP", lossless=True, quality=100, method=6)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def source_hash(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def read_manifest():
+    return read_json(MANIFEST_PATH, {})
+
+def write_manifest(manifest):
+    write_json(MANIFEST_PATH, manifest)
+
+def variant_files(entry):
+    return [variant[format] for variant in entry["variants"].values() for format in ("webp", "png")]
+
+def is_current(entry, digest):
+    if not entry or entry.get("source") != digest:
+        return False
+    return all((WEB_DIR / name).exists() for name in variant_files(entry))
+
+def build_variants(source):
+    image = Image.open(source).convert("RGB")
+    variants = {}
+
+    for width in WIDTHS:
+        if width > image.width:
+            continue
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        palette = resized.quantize(256, method=Image.Quantize.FASTOCTREE)
+
+        variants[str(width)] = {"height": height}
+        for format in ("webp", "png"):
+            data = encode(palette, format)
+            name = content_name(source.stem, width, data, format)
+            (WEB_DIR / name).write_bytes(data)
+            variants[str(width)][format] = name
+
+    return variants
+
+def remove_stale(manifest):
+    keep = {"manifest.json"}
+    for entry in manifest.values():
+        keep.update(variant_files(entry))
+    for path in WEB_DIR.glob("*"):
+        if path.name not in keep:
+            path.unlink()
+
+def build_web_assets():
+    WEB_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest()
+
+    for source in sorted(SOURCE_DIR.glob("storytelling_*.png")):
+        digest = source_hash(source)
+        if is_current(manifest.get(source.stem), digest):
+            continue
+        manifest[source.stem] = {"source": digest, "variants": build_variants(source)}
+        print(f"Webbversioner: {source.name}")
+
+    write_manifest(manifest)
+    remove_stale(manifest)
+    return manifest
+
+def image_sources(stem):
+    # None om webbversionerna saknas, sidan visar då original-PNG:n
+    entry = read_manifest().get(stem)
+    if not entry or not entry["variants"]:
+        return None
+
+    variants = entry["variants"]
+    widths = sorted(variants, key=int)
+    default = str(DEFAULT_WIDTH) if str(DEFAULT_WIDTH) in variants else widths[-1]
+
+    def srcset(format):
+        return ", ".join(f"/{URL_PREFIX}/{variants[w][format]} {w}w" for w in widths)
+
+    return {
+        "webp": srcset("webp"),
+        "png": srcset("png"),
+        "src": f"/{URL_PREFIX}/{variants[default]['png']}",
+        "width": default,
+        "height": variants[default]["height"],
+    }
+
+def image_url(stem):
+    sources = image_sources(stem)
+    return sources["src"] if sources else f"outputs/{stem}.png"
+
+def page_bytes(manifest, width=DEFAULT_WIDTH):
+    before = sum(path.stat().st_size for path in SOURCE_DIR.glob("storytelling_*.png"))
+    after = {
+        format: sum((WEB_DIR / entry["variants"][str(width)][format]).stat().st_size for entry in manifest.values())
+        for format in ("webp", "png")
+    }
+    return before, after
+
+def print_report(manifest):
+    before, _ = page_bytes(manifest)
+    print(f"Storytelling-sidan före: {before / 1000:.0f} kB (4 PNG i 300 dpi)")
+    for width in WIDTHS:
+        _, after = page_bytes(manifest, width)
+        print(f"  {width:>4} px: WebP {after['webp'] / 1000:.0f} kB, PNG {after['png'] / 1000:.0f} kB")
+
+if __name__ == "__main__":
+    print_report(build_web_assets())
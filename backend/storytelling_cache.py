@@ -0,0 +1,160 @@
+"""Storytelling-diagram 2 och 3 på begäran för valfritt utbildningsområde.
+
+Varje kombination av diagram, område och tröskel ritas en gång i en separat
+process och sparas som WebP i data/cache/storytelling/. Filnamnet är en hash
+av parametrarna, indatan och diagramfunktionens källkod, så en upprepad vy
+är bara en fil som redan finns. Katalogen hålls under YH_STORY_CACHE_ENTRIES
+filer genom att de som visades längst sedan tas bort.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image
+
+from backend.storytelling_assets import encode
+
+CACHE_DIR = Path("data/cache/storytelling")
+URL_PREFIX = "story-cache"
+MAX_ENTRIES = int(os.environ.get("YH_STORY_CACHE_ENTRIES", "64"))
+RENDER_WORKERS = int(os.environ.get("YH_STORY_RENDER_WORKERS", "1"))
+RENDER_DPI = 100
+CHARTS_SOURCE = Path(__file__).with_name("storytelling_charts.py")
+
+# Diagram -> (funktion, kolumner den läser)
+CHARTS = {
+    "trend": ("create_storytelling_datait_trend", ['Utbildningsområde', 'År', 'Beslut']),
+    "geografi": ("create_storytelling_geographic_opportunity", ['Utbildningsområde', 'Län', 'Beslut']),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_key_locks = {}
+_key_locks_lock = threading.Lock()
+
+def chart_function(chart):
+    # matplotlib laddas bara i renderingsprocessen
+    from backend import storytelling_charts
+    return getattr(storytelling_charts, CHARTS[chart][0])
+
+def chart_slice(df, chart, omrade):
+    return df.loc[df['Utbildningsområde'] == omrade, CHARTS[chart][1]]
+
+def chart_kwargs(chart, omrade, min_ansokningar):
+    if chart == "geografi":
+        return {"omrade": omrade, "min_ansokningar": min_ansokningar}
+    return {"omrade": omrade}
+
+@lru_cache(maxsize=1)
+def charts_source_hash():
+    # Källkoden läses som text så att servern slipper importera matplotlib
+    return hashlib.sha256(CHARTS_SOURCE.read_bytes()).hexdigest()
+
+def cache_name(chart, data, omrade, min_ansokningar):
+    digest = hashlib.sha256()
+    digest.update(charts_source_hash().encode("utf-8"))
+    digest.update(repr((chart, sorted(chart_kwargs(chart, omrade, min_ansokningar).items()), RENDER_DPI)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return f"{chart}-{digest.hexdigest()[:16]}.webp"
+
+def cache_url(name):
+    return f"/{URL_PREFIX}/{name}"
+
+def render_webp(chart, data, kwargs, path):
+    # Körs i renderingsprocessen: rita PNG, spara som WebP med 256 färger
+    png_path = path.with_suffix(".png")
+    chart_function(chart)(data, save_path=str(png_path), dpi=RENDER_DPI, **kwargs)
+    try:
+        image = Image.open(png_path).convert("RGB")
+        data = encode(image.quantize(256, method=Image.Quantize.FASTOCTREE), "webp")
+    finally:
+        png_path.unlink(missing_ok=True)
+
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+def start_render_pool():
+    # Anropas från main innan servern och uppvärmningen startar trådar. Med fork
+    # startas alla processer vid första jobbet, så de kopierar en process där
+    # ingen annan tråd kan hålla ett lås.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("fork"))
+    _pool.submit(os.getpid).result()
+
+def render_pool():
+    # Lång livslängd: processen startas vid första renderingen och återanvänds.
+    # Skapas poolen först här (i en tråd i servern) används forkserver i stället
+    # för fork, så att inga lås från andra trådar följer med.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+def reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+@contextmanager
+def key_lock(name):
+    # Låset tas bort när ingen längre väntar på nyckeln, så dict:en växer inte
+    with _key_locks_lock:
+        entry = _key_locks.setdefault(name, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[name]
+
+def prune(max_entries=MAX_ENTRIES):
+    files = sorted(CACHE_DIR.glob("*.webp"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files[max_entries:]:
+        path.unlink(missing_ok=True)
+
+def cached_chart(df, chart, omrade, min_ansokningar):
+    # URL om diagrammet redan finns i cachen, annars None
+    data = chart_slice(df, chart, omrade)
+    path = CACHE_DIR / cache_name(chart, data, omrade, min_ansokningar)
+    if not path.exists():
+        return None
+    os.utime(path)
+    return cache_url(path.name)
+
+def get_chart(df, chart, omrade, min_ansokningar):
+    # Blockerar anroparen (en bakgrundstråd) tills bilden finns
+    data = chart_slice(df, chart, omrade)
+    name = cache_name(chart, data, omrade, min_ansokningar)
+    path = CACHE_DIR / name
+
+    # Två sessioner som ber om samma bild väntar på samma rendering
+    with key_lock(name):
+        if path.exists():
+            os.utime(path)
+            return cache_url(name)
+
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        kwargs = chart_kwargs(chart, omrade, min_ansokningar)
+        try:
+            render_pool().submit(render_webp, chart, data, kwargs, path).result()
+        except BrokenProcessPool:
+            # En krasch i renderingsprocessen ska inte stoppa nästa rendering
+            reset_pool()
+            raise
+
+    prune()
+    return cache_url(name)
@@ -4,62 +4,33 @@ Data Storytelling för YH-kollen Presentation
 Strategiska visualiseringar för The Skool - fokus på Data/IT
 """
 
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from pathlib import Path
+from backend.data_loader import load_all_data, load_studerande_data
+from backend.manifest import read_json, write_json
+from backend.storytelling_assets import build_web_assets, print_report
 
 # Konfigurera matplotlib för svenska tecken och professionell stil
 plt.rcParams['font.family'] = 'DejaVu Sans'
 plt.rcParams['axes.unicode_minus'] = False
 sns.set_style("whitegrid")
 
-# ===== DATA LOADING =====
-def load_all_data():
-    """Ladda kurser och program från alla tillgängliga år"""
-    all_dfs = []
-
-    # KURSER 2022, 2023 och 2024
-    for year in [2022, 2023, 2024]:
-        try:
-            df = pd.read_excel(
-                f"data/raw/resultat-{year}-for-kurser-inom-yh.xlsx",
-                sheet_name="Lista ansökningar"
-            )
-            df['Typ'] = 'Kurs'
-            df['År'] = year
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"⚠️ Kunde inte ladda Kurser {year}: {e}")
-
-    # PROGRAM 2022, 2023, 2024
-    for year in [2022, 2023, 2024]:
-        try:
-            if year == 2022:
-                df = pd.read_excel(
-                    f"data/raw/resultat-ansokningsomgang-{year}-ny.xlsx",
-                    sheet_name="Tabell 4"
-                )
-            else:
-                df = pd.read_excel(
-                    f"data/raw/resultat-ansokningsomgang-{year}.xlsx",
-                    sheet_name="Tabell 3",
-                    skiprows=5
-                )
-
-            if 'Utbildningsanordnare administrativ enhet' in df.columns:
-                df['Anordnare namn'] = df['Utbildningsanordnare administrativ enhet']
-
-            df['Typ'] = 'Program'
-            df['År'] = year
-            all_dfs.append(df)
-        except Exception as e:
-            print(f"⚠️ Kunde inte ladda Program {year}: {e}")
-
-    combined = pd.concat(all_dfs, ignore_index=True)
-    print(f"Laddade {len(combined)} ansökningar totalt")
-    return combined
+OUTPUT_DIR = Path("outputs")
+MANIFEST_PATH = Path("data/cache/storytelling_manifest.json")
+RENDER_WORKERS = int(os.environ.get("YH_STORY_WORKERS", str(os.cpu_count() or 1)))
+DPI = 300
 
 
 # ===== STORYTELLING 1: GODKÄNNANDEGRAD PER OMRÅDE =====
@@ -70,7 +41,7 @@ def create_storytelling_approval_by_area(df, save_path="outputs/storytelling_1_a
     """
 
     # Beräkna godkännandegrad per område
-    approval_by_area = df.groupby('Utbildningsområde').apply(
+    approval_by_area = df.groupby('Utbildningsområde', observed=True).apply(
         lambda x: pd.Series({
             'Totalt': len(x),
             'Godkännandegrad': (x['Beslut'] == 'Beviljad').sum() / len(x) * 100
@@ -134,7 +105,7 @@ def create_storytelling_approval_by_area(df, save_path="outputs/storytelling_1_a
 
     # Spara figur
     Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.savefig(save_path, dpi=DPI, bbox_inches='tight')
     print(f"Sparad: {save_path}")
     plt.close()
 
@@ -142,17 +113,19 @@ def create_storytelling_approval_by_area(df, save_path="outputs/storytelling_1_a
 
 
 # ===== STORYTELLING 2: DATA/IT TREND ÖVER TID =====
-def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datait_trend.png"):
+def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datait_trend.png", omrade="Data/IT", dpi=DPI):
     """
     STORYTELLING 2: Blir det lättare eller svårare för Data/IT?
-    Visa trend för Data/IT godkännandegrad över tid
+    Visa trend för Data/IT (eller valfritt område) godkännandegrad över tid
     """
 
-    # Filtrera Data/IT
-    datait = df[df['Utbildningsområde'] == 'Data/IT']
+    # Filtrera på området
+    datait = df[df['Utbildningsområde'] == omrade]
+    if datait.empty:
+        raise ValueError(f"Inga ansökningar inom {omrade}")
 
     # Beräkna godkännandegrad per år
-    datait_by_year = datait.groupby('År').apply(
+    datait_by_year = datait.groupby('År', observed=True).apply(
         lambda x: pd.Series({
             'Ansökningar': len(x),
             'Beviljade': (x['Beslut'] == 'Beviljad').sum(),
@@ -178,9 +151,9 @@ def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datai
 
     ax.set_xlabel('År', fontsize=12, fontweight='bold')
     ax.set_ylabel('Godkännandegrad (%)', fontsize=12, fontweight='bold')
-    ax.set_title('Data/IT: Blir det lättare att få beviljat?\nGodkännandegrad för Data/IT-ansökningar över tid',
+    ax.set_title(f'{omrade}: Blir det lättare att få beviljat?\nGodkännandegrad för {omrade}-ansökningar över tid',
                  fontsize=16, fontweight='bold', pad=20)
-    ax.set_ylim(0, 40)
+    ax.set_ylim(0, max(40, datait_by_year['Godkännandegrad'].max() + 10))
     ax.set_xticks(datait_by_year['År'].unique())
     ax.grid(True, alpha=0.3, linestyle='--')
 
@@ -189,7 +162,7 @@ def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datai
     best_year = datait_by_year.loc[best_year_idx, 'År']
     best_value = datait_by_year.loc[best_year_idx, 'Godkännandegrad']
 
-    annotation_text = f"2023: Bästa chansen!\n{best_value:.1f}% godkänt"
+    annotation_text = f"{best_year}: Bästa chansen!\n{best_value:.1f}% godkänt"
 
     ax.annotate(annotation_text,
                 xy=(best_year +0.01, best_value + 0.5),
@@ -202,7 +175,7 @@ def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datai
 
     # Spara figur
     Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
     print(f"Sparad: {save_path}")
     plt.close()
 
@@ -210,20 +183,20 @@ def create_storytelling_datait_trend(df, save_path="outputs/storytelling_2_datai
 
 
 # ===== STORYTELLING 3: GODKÄNNANDEGRAD PER LÄN FÖR DATA/IT =====
-def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelling_3_geographic_opportunity.png"):
+def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelling_3_geographic_opportunity.png", omrade="Data/IT", min_ansokningar=10, dpi=DPI):
     """
     STORYTELLING 3: Var bör The Skool fokusera?
-    Visa godkännandegrad per län för Data/IT-ansökningar
+    Visa godkännandegrad per län för Data/IT-ansökningar (eller valfritt område)
     """
 
-    # Filtrera på Data/IT endast
-    df_datait = df[df['Utbildningsområde'] == 'Data/IT'].copy()
+    # Filtrera på området endast
+    df_datait = df[df['Utbildningsområde'] == omrade].copy()
 
     # Filtrera bort 'Flera kommuner'
     df_clean = df_datait[~df_datait['Län'].str.contains('Flera|Lista', na=False, case=False)]
 
     # Beräkna godkännandegrad per län
-    lan_stats = df_clean.groupby('Län').apply(
+    lan_stats = df_clean.groupby('Län', observed=True).apply(
         lambda x: pd.Series({
             'Totalt': len(x),
             'Beviljade': (x['Beslut'] == 'Beviljad').sum(),
@@ -232,20 +205,23 @@ def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelli
         include_groups=False
     )
 
-    # Filtrera på minst 10 ansökningar för statistisk relevans (lägre tröskelvärde för Data/IT)
-    lan_stats = lan_stats[lan_stats['Totalt'] >= 10]
+    # Filtrera på minst min_ansokningar (10 för Data/IT) för statistisk relevans
+    lan_stats = lan_stats[lan_stats['Totalt'] >= min_ansokningar]
+    if lan_stats.empty:
+        raise ValueError(f"Inget län har minst {min_ansokningar} ansökningar inom {omrade}")
     lan_stats_sorted = lan_stats.sort_values('Godkännandegrad', ascending=True)
 
-    # Ta bottom 5 (svårast) och top 5 (lättast)
-    bottom_5 = lan_stats_sorted.head(5)
-    top_5 = lan_stats_sorted.tail(5)
+    # Ta bottom 5 (svårast) och top 5 (lättast), färre om det finns färre än 10 län
+    n_bottom = min(5, len(lan_stats_sorted) // 2)
+    bottom_5 = lan_stats_sorted.head(n_bottom)
+    top_5 = lan_stats_sorted.tail(min(5, len(lan_stats_sorted) - n_bottom))
     combined = pd.concat([bottom_5, top_5])
 
     # Skapa figur
     fig, ax = plt.subplots(figsize=(14, 8))
 
     # Färgkodning: Röd för svårast (bottom 5), grön för lättast (top 5)
-    colors = ['#dc3545'] * 5 + ['#28a745'] * 5
+    colors = ['#dc3545'] * len(bottom_5) + ['#28a745'] * len(top_5)
 
     bars = ax.barh(range(len(combined)), combined['Godkännandegrad'].values, color=colors)
 
@@ -260,9 +236,9 @@ def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelli
 
     # Titlar och labels
     ax.set_xlabel('Godkännandegrad (%)', fontsize=12, fontweight='bold')
-    ax.set_title('Var i Sverige bör man fokusera för att maximera sina chanser inom Data/IT?\nData/IT godkännandegrad per län 2022-2024',
+    ax.set_title(f'Var i Sverige bör man fokusera för att maximera sina chanser inom {omrade}?\n{omrade} godkännandegrad per län 2022-2024',
                  fontsize=16, fontweight='bold', pad=20)
-    ax.set_xlim(0, 65)
+    ax.set_xlim(0, max(65, combined['Godkännandegrad'].max() + 15))
 
     # ANNOTATION 1 - pekar på bästa länet (peka utifrån mot slutet av stapeln)
     best_lan_idx = list(combined.index).index(top_5.index[-1])
@@ -272,23 +248,24 @@ def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelli
 
     ax.annotate(f"{best_lan}: {best_value:.1f}% godkänt\nBästa chansen! ({int(best_count)} ansökningar)",
                 xy=(best_value, best_lan_idx - 0.2),
-                xytext=(48, 7),
+                xytext=(48, min(7, len(combined) - 1)),
                 fontsize=10,
                 bbox=dict(boxstyle='round,pad=0.5', facecolor='#e6ffe6', edgecolor='#28a745', linewidth=2),
                 arrowprops=dict(arrowstyle='->', color='#28a745', lw=2.5, connectionstyle='arc3,rad=0.15'))
 
-    # ANNOTATION 2 - pekar på svåraste länet (Västerbotten med 0.0%)
-    worst_lan_idx = list(combined.index).index(bottom_5.index[0])
-    worst_lan = bottom_5.index[0]
-    worst_value = bottom_5['Godkännandegrad'].values[0]
-    worst_count = bottom_5['Totalt'].values[0]
+    # ANNOTATION 2 - pekar på svåraste länet (slutet av stapeln)
+    if not bottom_5.empty:
+        worst_lan_idx = list(combined.index).index(bottom_5.index[0])
+        worst_lan = bottom_5.index[0]
+        worst_value = bottom_5['Godkännandegrad'].values[0]
+        worst_count = bottom_5['Totalt'].values[0]
 
-    ax.annotate(f"{worst_lan}: {worst_value:.1f}% godkänt\nSvårast ({int(worst_count)} ansökningar)",
-                xy=(7.8, worst_lan_idx - 0.2),
-                xytext=(15, worst_lan_idx + 0.8),
-                fontsize=10,
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='#ffe6e6', edgecolor='#dc3545', linewidth=2),
-                arrowprops=dict(arrowstyle='->', color='#dc3545', lw=2.5, connectionstyle='arc3,rad=-0.2'))
+        ax.annotate(f"{worst_lan}: {worst_value:.1f}% godkänt\nSvårast ({int(worst_count)} ansökningar)",
+                    xy=(max(7.8, worst_value + 0.1), worst_lan_idx - 0.2),
+                    xytext=(max(15, worst_value + 7.2), worst_lan_idx + 0.8),
+                    fontsize=10,
+                    bbox=dict(boxstyle='round,pad=0.5', facecolor='#ffe6e6', edgecolor='#dc3545', linewidth=2),
+                    arrowprops=dict(arrowstyle='->', color='#dc3545', lw=2.5, connectionstyle='arc3,rad=-0.2'))
 
     # Grid
     ax.grid(axis='x', alpha=0.3, linestyle='--')
@@ -298,7 +275,7 @@ def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelli
 
     # Spara figur
     Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
     print(f"Sparad: {save_path}")
     plt.close()
 
@@ -306,29 +283,19 @@ def create_storytelling_geographic_opportunity(df, save_path="outputs/storytelli
 
 
 # ===== STORYTELLING 4: EXAMENSGRAD PER UTBILDNINGSOMRÅDE =====
-def create_storytelling_graduation_rate(save_path="outputs/storytelling_4_graduation_rate.png"):
+def create_storytelling_graduation_rate(df_scb, save_path="outputs/storytelling_4_graduation_rate.png"):
     """
     STORYTELLING 4: Vilka områden har högst examensgrad?
     Visa examensgrad för olika utbildningsområden (2024 data från SCB)
     """
 
-    # Läs SCB-data för studerande och examinerade
-    df_scb = pd.read_csv("data/raw/studerande_utbildningsomrade_overtid.csv", encoding='ISO-8859-1')
-
-    # Filtrera på år 2024
-    df_2024 = df_scb[
-        (df_scb['år'] == 2024) &
-        (df_scb['kön'] == 'totalt') &
-        (df_scb['ålder'] == 'totalt')
-    ].copy()
-
-    # Separera aktiva studenter och examinerade
-    aktiva = df_2024[df_2024['tabellinnehåll'] == 'Antal studerande'].set_index('utbildningens inriktning')
-    examinerade = df_2024[df_2024['tabellinnehåll'] == 'Antal examinerade'].set_index('utbildningens inriktning')
+    # df_scb: aktiva och examinerade 2024 per utbildningsområde, NaN där SCB saknar uppgift
+    aktiva = df_scb['Antal studerande']
+    examinerade = df_scb['Antal examinerade']
 
     # Beräkna examensgrad
     result = []
-    for omrade in aktiva.index:
+    for omrade in df_scb.index:
         if omrade == 'Totalt':
             continue
 
@@ -337,45 +304,25 @@ def create_storytelling_graduation_rate(save_path="outputs/storytelling_4_gradua
             # Skippa en av dem, vi hanterar dem tillsammans senare
             continue
 
-        # Hämta värden och konvertera till skalär
-        aktiva_val = aktiva.loc[omrade, 'Studerande och examinerade inom yrkeshögskolan']
-        if isinstance(aktiva_val, pd.Series):
-            aktiva_val = aktiva_val.iloc[0]
+        if pd.notna(examinerade[omrade]) and pd.notna(aktiva[omrade]):
+            examensgrad = (examinerade[omrade] / aktiva[omrade]) * 100
 
-        if omrade in examinerade.index:
-            exam_val = examinerade.loc[omrade, 'Studerande och examinerade inom yrkeshögskolan']
-            if isinstance(exam_val, pd.Series):
-                exam_val = exam_val.iloc[0]
-
-            # Hantera ".." värden
-            if exam_val != '..' and aktiva_val != '..':
-                exam_antal = float(exam_val)
-                aktiva_antal = float(aktiva_val)
-
-                examensgrad = (exam_antal / aktiva_antal) * 100
-
-                result.append({
-                    'Utbildningsområde': omrade,
-                    'Examensgrad': examensgrad
-                })
+            result.append({
+                'Utbildningsområde': omrade,
+                'Examensgrad': examensgrad
+            })
 
     # Lägg till sammanslagna pedagogik-data
-    if 'Pedagogik och lärarutbildning' in aktiva.index:
-        ped_aktiva = aktiva.loc['Pedagogik och lärarutbildning', 'Studerande och examinerade inom yrkeshögskolan']
-        if isinstance(ped_aktiva, pd.Series):
-            ped_aktiva = ped_aktiva.iloc[0]
-
-        if 'Pedagogik och lärarutbildning' in examinerade.index:
-            ped_exam = examinerade.loc['Pedagogik och lärarutbildning', 'Studerande och examinerade inom yrkeshögskolan']
-            if isinstance(ped_exam, pd.Series):
-                ped_exam = ped_exam.iloc[0]
-
-            if ped_exam != '..' and ped_aktiva != '..':
-                ped_examensgrad = (float(ped_exam) / float(ped_aktiva)) * 100
-                result.append({
-                    'Utbildningsområde': 'Pedagogik',
-                    'Examensgrad': ped_examensgrad
-                })
+    if 'Pedagogik och lärarutbildning' in df_scb.index:
+        ped_aktiva = aktiva['Pedagogik och lärarutbildning']
+        ped_exam = examinerade['Pedagogik och lärarutbildning']
+
+        if pd.notna(ped_exam) and pd.notna(ped_aktiva):
+            ped_examensgrad = (ped_exam / ped_aktiva) * 100
+            result.append({
+                'Utbildningsområde': 'Pedagogik',
+                'Examensgrad': ped_examensgrad
+            })
 
     df_exam = pd.DataFrame(result)
     df_exam_sorted = df_exam.sort_values('Examensgrad', ascending=True)
@@ -457,13 +404,98 @@ def create_storytelling_graduation_rate(save_path="outputs/storytelling_4_gradua
 
     # Spara figur
     Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.savefig(save_path, dpi=DPI, bbox_inches='tight')
     print(f"Sparad: {save_path}")
     plt.close()
 
     return fig
 
 
+# ===== BYGGPIPELINE =====
+def graduation_slice(store, year=2024):
+    # Bara det SCB-utdrag som diagram 4 använder
+    if store.empty or year not in store.years:
+        return pd.DataFrame(columns=['Antal studerande', 'Antal examinerade'], dtype='float64')
+    return pd.DataFrame({
+        tabell: store.frame(tabell)[year]
+        for tabell in ['Antal studerande', 'Antal examinerade']
+    })
+
+def chart_jobs(df, stud_store):
+    # (namn, funktion, indata): varje diagram får bara de kolumner och rader det läser
+    datait = df[df['Utbildningsområde'] == 'Data/IT']
+    return [
+        ("storytelling_1_approval_by_area", create_storytelling_approval_by_area, df[['Utbildningsområde', 'Beslut']]),
+        ("storytelling_2_datait_trend", create_storytelling_datait_trend, datait[['Utbildningsområde', 'År', 'Beslut']]),
+        ("storytelling_3_geographic_opportunity", create_storytelling_geographic_opportunity, datait[['Utbildningsområde', 'Län', 'Beslut']]),
+        ("storytelling_4_graduation_rate", create_storytelling_graduation_rate, graduation_slice(stud_store)),
+    ]
+
+def input_hash(function, data, save_path):
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(function).encode("utf-8"))
+    digest.update(json.dumps({"save_path": str(save_path), "dpi": DPI}).encode("utf-8"))
+    digest.update(",".join(map(str, data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def read_manifest():
+    return read_json(MANIFEST_PATH, {})
+
+def write_manifest(manifest):
+    write_json(MANIFEST_PATH, manifest)
+
+def render_chart(function, data, save_path):
+    start = time.perf_counter()
+    function(data, save_path=str(save_path))
+    return time.perf_counter() - start
+
+def build_storytelling(df, stud_store, force=False, workers=RENDER_WORKERS):
+    manifest = {} if force else read_manifest()
+    stale = []
+
+    for name, function, data in chart_jobs(df, stud_store):
+        save_path = OUTPUT_DIR / f"{name}.png"
+        if data.empty:
+            print(f"Hoppar över {save_path}: ingen indata")
+            continue
+        digest = input_hash(function, data, save_path)
+        if manifest.get(name, {}).get("hash") == digest and save_path.exists():
+            print(f"Oförändrad: {save_path}")
+            continue
+        stale.append((name, function, data, save_path, digest))
+
+    if not stale:
+        print("Alla storytelling-diagram är aktuella")
+        return manifest
+
+    def record(name, save_path, digest, result):
+        if isinstance(result, Exception):
+            print(f"Kunde inte skapa {save_path}: {result}")
+            return
+        manifest[name] = {"hash": digest, "output": str(save_path), "seconds": round(result, 2)}
+
+    if workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale))) as pool:
+            futures = [(job, pool.submit(render_chart, job[1], job[2], job[3])) for job in stale]
+            for (name, _, _, save_path, digest), future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                record(name, save_path, digest, result)
+    else:
+        for name, function, data, save_path, digest in stale:
+            try:
+                result = render_chart(function, data, save_path)
+            except Exception as e:
+                result = e
+            record(name, save_path, digest, result)
+
+    write_manifest(manifest)
+    return manifest
+
+
 # ===== MAIN EXECUTION =====
 if __name__ == "__main__":
     print("\n" + "="*60)
@@ -486,20 +518,15 @@ if __name__ == "__main__":
     print(f"   - Beviljade: {(datait['Beslut'] == 'Beviljad').sum()}")
     print(f"   - Godkännandegrad: {(datait['Beslut'] == 'Beviljad').sum() / len(datait) * 100:.1f}%")
 
-    # Skapa visualiseringar
+    # Skapa visualiseringar, bara de vars indata ändrats
     print("\nSkapar storytelling-visualiseringar...\n")
+    stud_store, _ = load_studerande_data()
+    start = time.perf_counter()
+    build_storytelling(df, stud_store, force="--force" in sys.argv)
+    print(f"\nByggtid: {time.perf_counter() - start:.1f} s\n")
 
-    print("1. Godkännandegrad per område (Data/IT challenge)...")
-    fig1 = create_storytelling_approval_by_area(df)
-
-    print("2. Data/IT trend över tid (Blir det bättre?)...")
-    fig2 = create_storytelling_datait_trend(df)
-
-    print("3. Geografiska möjligheter (Var finns chansen?)...")
-    fig3 = create_storytelling_geographic_opportunity(df)
-
-    print("4. Examensgrad per område (Vem slutför?)...")
-    fig4 = create_storytelling_graduation_rate()
+    # Skalade WebP/PNG-versioner för storytelling-sidan
+    print_report(build_web_assets())
 
     print("\n" + "="*60)
     print("KLART! Storytelling för The Skool klar!")
@@ -0,0 +1,103 @@
+"""SCB:s tidsserie över studerande och examinerade, inläst en gång.
+
+CSV-filen pivoteras till en flyttalsmatris med axlarna område × år ×
+tabellinnehåll × kön × ålder. SCB:s '..' (uppgift saknas) blir NaN, så alla
+uppslag är rena indexeringar utan strängjämförelser eller omkodning.
+"""
+import numpy as np
+import pandas as pd
+
+STUDERANDE_PATH = "data/raw/studerande_utbildningsomrade_overtid.csv"
+VALUE_COLUMN = 'Studerande och examinerade inom yrkeshögskolan'
+AXES = ['utbildningens inriktning', 'år', 'tabellinnehåll', 'kön', 'ålder']
+
+class StuderandeStore:
+    def __init__(self, values, axes):
+        self.values = values
+        self.axes = axes
+        self._positions = {
+            name: {label: i for i, label in enumerate(labels)}
+            for name, labels in axes.items()
+        }
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    @property
+    def years(self):
+        return self.axes['år']
+
+    def labels(self, axis):
+        # 'totalt' först, sedan i filens ordning
+        labels = list(self.axes[axis])
+        return sorted(labels, key=lambda label: label != 'totalt')
+
+    def position(self, axis, label):
+        return self._positions[axis].get(label, -1)
+
+    def series(self, omrade, tabell, kon='totalt', alder='totalt'):
+        # Värden per år, NaN där SCB saknar uppgift
+        keys = [
+            self.position('utbildningens inriktning', omrade),
+            self.position('tabellinnehåll', tabell),
+            self.position('kön', kon),
+            self.position('ålder', alder),
+        ]
+        if self.empty or min(keys) < 0:
+            return pd.Series(dtype='float64', index=pd.Index([], name='år'))
+
+        omrade_i, tabell_i, kon_i, alder_i = keys
+        return pd.Series(self.values[omrade_i, :, tabell_i, kon_i, alder_i], index=self.years)
+
+    def frame(self, tabell, kon='totalt', alder='totalt'):
+        # Område × år för ett tabellinnehåll
+        keys = [self.position('tabellinnehåll', tabell), self.position('kön', kon), self.position('ålder', alder)]
+        if self.empty or min(keys) < 0:
+            return pd.DataFrame(index=self.axes['utbildningens inriktning'], columns=self.years, dtype='float64')
+
+        tabell_i, kon_i, alder_i = keys
+        return pd.DataFrame(
+            self.values[:, :, tabell_i, kon_i, alder_i],
+            index=self.axes['utbildningens inriktning'],
+            columns=self.years,
+            copy=True
+        )
+
+    def value(self, omrade, year, tabell, kon='totalt', alder='totalt'):
+        keys = [
+            self.position('utbildningens inriktning', omrade),
+            self.position('år', year),
+            self.position('tabellinnehåll', tabell),
+            self.position('kön', kon),
+            self.position('ålder', alder),
+        ]
+        if self.empty or min(keys) < 0:
+            return np.nan
+        return self.values[tuple(keys)]
+
+def empty_store():
+    return StuderandeStore(np.empty((0, 0, 0, 0, 0)), {name: pd.Index([]) for name in AXES})
+
+def build_store(df):
+    # Axlarna i den ordning värdena först förekommer i filen, åren sorterade
+    axes = {name: pd.Index(pd.unique(df[name])) for name in AXES}
+    axes['år'] = pd.Index(sorted(axes['år']), name='år')
+
+    positions = [axes[name].get_indexer(df[name]) for name in AXES]
+    values = np.full([len(axes[name]) for name in AXES], np.nan)
+
+    # Baklänges så att första förekomsten vinner om en cell finns två gånger
+    numbers = df[VALUE_COLUMN].to_numpy(dtype='float64')
+    values[tuple(p[::-1] for p in positions)] = numbers[::-1]
+
+    return StuderandeStore(values, axes)
+
+def read_studerande(path=STUDERANDE_PATH):
+    return pd.read_csv(
+        path,
+        encoding='ISO-8859-1',
+        na_values=['..'],
+        keep_default_na=False,
+        dtype={VALUE_COLUMN: 'float64', 'år': 'int16'},
+    )
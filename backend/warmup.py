@@ -0,0 +1,147 @@
+"""Uppvärmning av figurcachen i bakgrunden.
+
+När GUI:t svarar på sin port räknas figurerna för alla filterkombinationer
+fram i en trådpool, de mest använda först: varje sidas standardval, sedan
+Översikt utan anordnare, Studenttrender-områdena och därefter anordnarna i
+storleksordning, på Anordnare-sidan och Översikt. Det som inte får plats i
+figurcachen hoppas över. Första klicket träffar då en varm cache. Förloppet kan läsas via PROGRESS.status().
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.callbacks import cached_anordnare_insights, cached_dashboard, cached_studerande
+from backend.figure_cache import FIGURE_CACHE
+
+WARMUP_ENABLED = os.environ.get("YH_WARMUP", "0") == "1"
+WARMUP_WORKERS = int(os.environ.get("YH_WARMUP_WORKERS", "2"))
+
+class WarmupProgress:
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def start(self, total):
+        with self._lock:
+            self.total = total
+            self.done = 0
+            self.started = time.perf_counter()
+            self.finished = None
+
+    def step(self):
+        with self._lock:
+            self.done += 1
+            return self.done
+
+    def finish(self):
+        with self._lock:
+            self.finished = time.perf_counter()
+
+    def status(self):
+        with self._lock:
+            if self.started is None:
+                return {"state": "inte startad", "done": 0, "total": 0, "seconds": 0}
+            end = self.finished or time.perf_counter()
+            return {
+                "state": "klar" if self.finished else "pågår",
+                "done": self.done,
+                "total": self.total,
+                "seconds": round(end - self.started, 1),
+            }
+
+PROGRESS = WarmupProgress()
+
+def warmup_jobs(df, df_index, cube, cube_index, years, types, omrade, omrade_list, stud_store, examensgrad_matrix):
+    jobs = []
+
+    # 1. Varje sidas standardval, det som första besöket visar
+    jobs.append(lambda: cached_dashboard(cube, cube_index, "Alla", "Alla", "Alla"))
+    jobs.append(lambda: cached_studerande(omrade, stud_store, examensgrad_matrix))
+    jobs.append(lambda: cached_anordnare_insights(df, df_index, "Alla", "Alla"))
+
+    # 2. Översikt utan anordnarfilter
+    for year in years:
+        for typ in types:
+            if (year, typ) != ("Alla", "Alla"):
+                jobs.append(lambda y=year, t=typ: cached_dashboard(cube, cube_index, y, t, "Alla"))
+
+    # 3. Studenttrender, ett område per post
+    for o in omrade_list:
+        if o != omrade:
+            jobs.append(lambda o=o: cached_studerande(o, stud_store, examensgrad_matrix))
+
+    # 4. Anordnarna med flest ansökningar först: Anordnare-sidan och Översikt för alla år
+    by_size = df['Anordnare namn'].value_counts().index
+    for anordnare in by_size:
+        jobs.append(lambda a=anordnare: cached_anordnare_insights(df, df_index, a, "Alla"))
+        jobs.append(lambda a=anordnare: cached_dashboard(cube, cube_index, "Alla", "Alla", a))
+
+    # 5. Samma anordnare per år och typ
+    for anordnare in by_size:
+        for year in years:
+            if year != "Alla":
+                jobs.append(lambda y=year, a=anordnare: cached_anordnare_insights(df, df_index, a, y))
+            for typ in types:
+                if (year, typ) != ("Alla", "Alla"):
+                    jobs.append(lambda y=year, t=typ, a=anordnare: cached_dashboard(cube, cube_index, y, t, a))
+
+    # Fler jobb än cacheplatser skulle bara tränga ut de populäraste. Anordnare-sidan
+    # cachar också rankingen per år och områdesstatistiken, de behöver egna platser.
+    room = max(0, FIGURE_CACHE.max_entries - len(years) - 1)
+    if len(jobs) > room:
+        print(f"Uppvärmning: {len(jobs) - room} av {len(jobs)} kombinationer får inte plats i figurcachen och hoppas över")
+    return jobs[:room]
+
+def run_warmup(jobs, workers=WARMUP_WORKERS):
+    PROGRESS.start(len(jobs))
+    report_every = max(1, len(jobs) // 10)
+
+    def run(job):
+        try:
+            job()
+        except Exception as e:
+            print(f"Uppvärmning misslyckades: {e}")
+        done = PROGRESS.step()
+        if done % report_every == 0:
+            status = PROGRESS.status()
+            print(f"Uppvärmning: {done}/{status['total']} ({status['seconds']} s)")
+
+    # Första jobbet körs ensamt: Plotly laddar sina mallar vid första
+    # användningen och det är inte trådsäkert
+    if jobs:
+        run(jobs[0])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, jobs[1:]))
+
+    PROGRESS.finish()
+    status = PROGRESS.status()
+    print(f"Uppvärmning klar: {status['done']} kombinationer på {status['seconds']} s")
+
+def wait_for_port(port, host="127.0.0.1", timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+def start_warmup(port, jobs, workers=WARMUP_WORKERS, started=None):
+    def run():
+        if not wait_for_port(port):
+            print(f"Uppvärmning avbruten: port {port} svarar inte")
+            return
+        if started is not None:
+            print(f"Servern svarar efter {time.perf_counter() - started:.2f} s")
+        run_warmup(jobs, workers)
+
+    thread = threading.Thread(target=run, name="figure-warmup", daemon=True)
+    thread.start()
+    return thread
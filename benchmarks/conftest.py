@@ -0,0 +1,146 @@
+"""Mätverktyg för benchmarks: tider, minnestopp och jämförelse mot baslinje.
+
+    python -m pytest benchmarks                              # 1×
+    python -m pytest benchmarks --bench-scales 1,10,100
+    python -m pytest benchmarks --bench-json data/cache/bench/baseline.json
+    python -m pytest benchmarks --bench-baseline data/cache/bench/baseline.json
+
+Varje mätning körs --bench-rounds gånger (median och min redovisas) och en
+gång till under tracemalloc för minnestoppen, eftersom tracemalloc gör koden
+långsammare. Mot en baslinje markeras mätningar vars median ökat mer än
+--bench-tolerance; med --bench-fail blir körningen då underkänd. bench()
+returnerar värdet från sista körningen, så att testet kan kontrollera det.
+"""
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from backend.instrumentation import set_log_level
+from benchmarks.dataset import load_dataset
+
+RESULTS = []
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-scales", default="1", help="skalor att mäta, t.ex. 1,10,100")
+    group.addoption("--bench-rounds", type=int, default=3, help="körningar per mätning")
+    group.addoption("--bench-json", type=Path, help="spara resultaten som JSON")
+    group.addoption("--bench-baseline", type=Path, help="jämför med en tidigare sparad JSON")
+    group.addoption("--bench-tolerance", type=float, default=0.2, help="tillåten ökning av medianen (0.2 = 20 %%)")
+    group.addoption("--bench-fail", action="store_true", help="underkänn körningen vid regression")
+
+def pytest_configure(config):
+    # En loggrad per callback skulle mätas med och fylla utskriften
+    set_log_level("warning")
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [int(scale) for scale in metafunc.config.getoption("bench_scales").split(",")]
+        metafunc.parametrize("scale", scales, ids=[f"x{scale}" for scale in scales], scope="session")
+
+@pytest.fixture(scope="session")
+def dataset(scale):
+    return load_dataset(scale)
+
+@pytest.fixture
+def bench(request, scale):
+    default_rounds = request.config.getoption("bench_rounds")
+
+    def run(name, function, rounds=None, setup=None):
+        rounds = rounds or default_rounds
+        times = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            value = function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "name": name,
+            "scale": scale,
+            "rounds": rounds,
+            "median_ms": round(statistics.median(times) * 1000, 2),
+            "min_ms": round(min(times) * 1000, 2),
+            "peak_mb": round(peak / 2**20, 2),
+        }
+        RESULTS.append(result)
+        return value
+
+    return run
+
+def read_baseline(path):
+    if path is None:
+        return {}
+    results = json.loads(path.read_text(encoding="utf-8"))["results"]
+    return {(result["name"], result["scale"]): result for result in results}
+
+def regressions(results, baseline, tolerance):
+    slower = []
+    for result in results:
+        before = baseline.get((result["name"], result["scale"]))
+        if before and result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            slower.append(result)
+    return slower
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not RESULTS:
+        return
+
+    path = config.getoption("bench_json")
+    if path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": RESULTS,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    baseline = read_baseline(config.getoption("bench_baseline"))
+    if config.getoption("bench_fail") and regressions(RESULTS, baseline, config.getoption("bench_tolerance")):
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not RESULTS:
+        return
+
+    baseline = read_baseline(config.getoption("bench_baseline"))
+    tolerance = config.getoption("bench_tolerance")
+    slower = regressions(RESULTS, baseline, tolerance)
+
+    write = terminalreporter.write_line
+    terminalreporter.section("benchmarks")
+    header = f"{'Mätning':<40} {'Skala':>6} {'Median ms':>11} {'Min ms':>10} {'Topp MB':>9}"
+    if baseline:
+        header += f" {'Baslinje ms':>12} {'Ändring':>8}"
+    write(header)
+
+    for result in sorted(RESULTS, key=lambda result: (result["name"], result["scale"])):
+        line = (f"{result['name']:<40} {'x' + str(result['scale']):>6} {result['median_ms']:>11.1f} "
+                f"{result['min_ms']:>10.1f} {result['peak_mb']:>9.1f}")
+        before = baseline.get((result["name"], result["scale"]))
+        if before:
+            change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0
+            line += f" {before['median_ms']:>12.1f} {change:>+8.0%}"
+            if result in slower:
+                line += "  långsammare"
+        write(line)
+
+    if baseline:
+        write(f"{len(slower)} av {len(RESULTS)} mätningar mer än {tolerance:.0%} långsammare än baslinjen")
@@ -0,0 +1,75 @@
+"""Syntetisk data inläst på samma sätt som main.py gör vid start."""
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from backend.calculations import build_examensgrad_matrix, examensgrad_years
+from backend.cube import build_cube
+from backend.data_loader import load_all_data, load_studerande_data
+from backend.data_model import build_position_index
+from backend.regions import region_codes
+from benchmarks.generate import generate
+
+@contextmanager
+def in_directory(path):
+    # Som contextlib.chdir, som kräver Python 3.11
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def load_dataset(scale, seed=1):
+    root, info = generate(scale, seed=seed)
+
+    # Geometrin läses relativt repot och cachas, så den måste laddas före katalogbytet
+    region_codes()
+    with in_directory(root):
+        df = load_all_data()
+        stud_store, omrade_list = load_studerande_data()
+
+    cube = build_cube(df)
+    examensgrad_matrix = build_examensgrad_matrix(stud_store)
+    return SimpleNamespace(
+        root=root,
+        scale=scale,
+        rows=info["rows"],
+        df=df,
+        cube=cube,
+        df_index=build_position_index(df),
+        cube_index=build_position_index(cube),
+        stud_store=stud_store,
+        omrade_list=omrade_list,
+        examensgrad_matrix=examensgrad_matrix,
+        stud_years=examensgrad_years(examensgrad_matrix) or ["2024"],
+        kon_list=stud_store.labels('kön') or ["totalt"],
+        alder_list=stud_store.labels('ålder') or ["totalt"],
+        years=["Alla", "2024", "2023", "2022"],
+        types=["Alla", "Kurs", "Program"],
+        # Störst först, som anordnarlistan i uppvärmningen
+        anordnare=list(df['Anordnare namn'].value_counts().index),
+    )
+
+def stand_in_state(data, **values):
+    # Samma variabler som main.py, callbacks läser och skriver dem som på Taipys State
+    state = SimpleNamespace(
+        df=data.df,
+        df_index=data.df_index,
+        cube=data.cube,
+        cube_index=data.cube_index,
+        stud_store=data.stud_store,
+        examensgrad_matrix=data.examensgrad_matrix,
+        selected_year="Alla",
+        selected_type="Alla",
+        selected_anordnare="Alla",
+        selected_anordnare_insight="Alla",
+        selected_year_insight="Alla",
+        selected_omrade="Data/It",
+        selected_kon="totalt",
+        selected_alder="totalt",
+        selected_stud_year="2024",
+    )
+    for name, value in values.items():
+        setattr(state, name, value)
+    return state
@@ -0,0 +1,183 @@
+"""Syntetiska MYH-arbetsböcker och SCB-fil i 1×, 10× eller 100× dagens storlek.
+
+Raderna dras med återläggning ur de riktiga arbetsböckerna i data/raw, så
+fördelningen över områden, län, beslut och platser följer verkligheten.
+Varje arbetsbok får samma filnamn, flikar, rubrikrad och inledande rader
+(skiprows) som originalet, plus några tomma rader sist i fliken som
+läsläget ibland ger. Diarienumren görs unika och antalet anordnare växer
+med roten ur skalan. SCB-filen skrivs i långt format (ISO-8859-1, '..' för
+saknade uppgifter) med områdena från den breda filen, upprepade per skala.
+
+    python -m benchmarks.generate --scale 10        # till data/cache/bench/x10
+    python -m benchmarks.generate --scale 100 --seed 2 --out /tmp/yh100
+"""
+import argparse
+import csv
+import json
+import math
+import random
+from pathlib import Path
+
+import openpyxl
+
+from backend.data_loader import SOURCES
+from backend.studerande_store import STUDERANDE_PATH, VALUE_COLUMN
+
+RAW_DIR = Path("data/raw")
+SCB_WIDE_PATH = RAW_DIR / "stud_utbildningsområde_övertid.csv"
+BENCH_DIR = Path("data/cache/bench")
+GENERATOR_VERSION = 1
+TRAILING_EMPTY_ROWS = 3
+
+SCB_TABLES = ['Antal studerande', 'Antal examinerade']
+SCB_KON = {'totalt': 1.0, 'kvinnor': 0.55, 'män': 0.45}
+SCB_ALDER = {'totalt': 1.0, '-24 år': 0.3, '25-29 år': 0.3, '30+ år': 0.4}
+
+# SCB bytte namn på pedagogikområdet, den gamla serien slutar 2020 och den nya börjar 2019
+SCB_YEAR_RANGES = {
+    'Pedagogik och lärarutbildning': (2005, 2020),
+    'Pedagogik och undervisning': (2019, 2024),
+}
+
+def bench_dir(scale):
+    return BENCH_DIR / f"x{scale}"
+
+def read_workbook(path):
+    # Värden i stället för formler: 2022 års kursfil har t.ex. VLOOKUP i 'Beslut'
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return {name: [list(row) for row in workbook[name].iter_rows(values_only=True)] for name in workbook.sheetnames}
+    finally:
+        workbook.close()
+
+def strip_empty(rows):
+    rows = list(rows)
+    while rows and all(value is None for value in rows[-1]):
+        rows.pop()
+    return rows
+
+def organizer_groups(scale):
+    return max(1, math.ceil(math.sqrt(scale)))
+
+def synthetic_rows(rows, header, year, scale, rng):
+    diarie = header.index('Diarienummer')
+    organizer = next((header.index(title) for title in ('Anordnare namn', 'Utbildningsanordnare administrativ enhet') if title in header), None)
+    groups = organizer_groups(scale)
+
+    for n in range(len(rows) * scale):
+        row = list(rng.choice(rows))
+        row[diarie] = f"MYH {year}/{10000 + n}"
+
+        # Nya anordnare vid större skalor, så att anordnarlistan också växer
+        group = n % groups
+        if organizer is not None and group and row[organizer]:
+            row[organizer] = f"{row[organizer]} ({group})"
+        yield row
+
+def write_workbook(source, sheets, path, scale, rng):
+    year, _, _, data_sheet, skiprows = source
+    workbook = openpyxl.Workbook(write_only=True)
+    n_rows = 0
+
+    for name, rows in sheets.items():
+        sheet = workbook.create_sheet(name)
+        if name != data_sheet:
+            # Övriga flikar behålls med namn och rubrikrad
+            for row in rows[:skiprows + 1]:
+                sheet.append(row)
+            continue
+
+        rows = strip_empty(rows)
+        preamble, header, data = rows[:skiprows], rows[skiprows], rows[skiprows + 1:]
+        for row in preamble:
+            sheet.append(row)
+        sheet.append(header)
+        for row in synthetic_rows(data, header, year, scale, rng):
+            sheet.append(row)
+            n_rows += 1
+        for _ in range(TRAILING_EMPTY_ROWS):
+            sheet.append([None] * len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+    return n_rows
+
+def scb_areas(scale):
+    # Den breda filen (UTF-8) har en rad per område med antal studerande per år
+    with open(SCB_WIDE_PATH, encoding='utf-8', newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row['kön'] == 'totalt']
+    years = [int(column) for column in rows[0] if column.isdigit()]
+    levels = {row['utbildningens inriktning']: [int(row[str(y)]) for y in years] for row in rows}
+    levels['Pedagogik och lärarutbildning'] = levels['Pedagogik och undervisning']
+
+    # Totalt först, därefter områdena upprepade per skala
+    result = [('Totalt', levels['Totalt'])]
+    for k in range(scale):
+        for area, area_levels in levels.items():
+            if area != 'Totalt':
+                result.append((area if k == 0 else f"{area} {k}", area_levels))
+    return years, result
+
+def write_scb(path, scale, rng):
+    years, areas = scb_areas(scale)
+    n_rows = 0
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='ISO-8859-1', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(['kön', 'utbildningens inriktning', 'ålder', 'tabellinnehåll', 'år', VALUE_COLUMN])
+        for tabell in SCB_TABLES:
+            for kon, kon_share in SCB_KON.items():
+                for area, levels in areas:
+                    first, last = SCB_YEAR_RANGES.get(area, (years[0], years[-1]))
+                    for alder, alder_share in SCB_ALDER.items():
+                        for year, level in zip(years, levels):
+                            if not first <= year <= last:
+                                continue
+                            if tabell == 'Antal examinerade' and year < 2007 or rng.random() < 0.03:
+                                value = '..'
+                            else:
+                                share = kon_share * alder_share * (rng.uniform(0.25, 0.35) if tabell == 'Antal examinerade' else 1)
+                                value = int(level * share * rng.uniform(0.9, 1.1))
+                            writer.writerow([kon, area, alder, tabell, year, value])
+                            n_rows += 1
+    return n_rows
+
+def generate(scale, out=None, seed=1, force=False):
+    # Katalogen får samma struktur som repot (data/raw/...), så data_loader kan läsa den direkt
+    out = Path(out) if out else bench_dir(scale)
+    marker = out / "generated.json"
+    expected = {"version": GENERATOR_VERSION, "scale": scale, "seed": seed}
+
+    if not force and marker.exists():
+        info = json.loads(marker.read_text(encoding="utf-8"))
+        if all(info.get(key) == value for key, value in expected.items()):
+            return out, info
+
+    rng = random.Random(seed)
+    rows = {}
+    for source in SOURCES:
+        path = source[2]
+        rows[path] = write_workbook(source, read_workbook(path), out / path, scale, rng)
+        print(f"Genererade {out / path}: {rows[path]} rader")
+
+    rows[STUDERANDE_PATH] = write_scb(out / STUDERANDE_PATH, scale, rng)
+    print(f"Genererade {out / STUDERANDE_PATH}: {rows[STUDERANDE_PATH]} rader")
+
+    info = dict(expected, rows=rows)
+    marker.write_text(json.dumps(info, indent=2, ensure_ascii=False), encoding="utf-8")
+    return out, info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generera syntetisk MYH- och SCB-data")
+    parser.add_argument("--scale", type=int, default=1, help="1, 10 eller 100 gånger dagens radantal")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args(argv)
+
+    out, info = generate(args.scale, args.out, args.seed, args.force)
+    print(f"{out}: {sum(info['rows'].values())} rader totalt")
+
+if __name__ == "__main__":
+    main()
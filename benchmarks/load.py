@@ -0,0 +1,187 @@
+"""Lastsimulering: många samtidiga sessioner mot callbacks, utan webbläsare.
+
+Varje session är en tråd med ett eget state-objekt (som Taipys State) som
+ändrar ett slumpat filter och anropar callbacken som sidan kopplar till det:
+update_dashboard (Översikt/Karta), update_anordnare_insights (Anordnare)
+eller update_studerande (Studenttrender). Anordnare väljs oftare ju större
+de är. Alla sessioner delar data och figurcache, precis som i servern, och
+figurcachen töms före varje nivå så att nivåerna börjar lika.
+
+    python -m benchmarks.load                               # 1, 2, 4, 8, 16 sessioner
+    python -m benchmarks.load --sessions 1,8,32 --requests 50 --scale 10
+    python -m benchmarks.load --think-ms 200 --json data/cache/bench/load.json
+    python -m benchmarks.load --metrics data/cache/bench/prestanda.json  # histogram per callback och diagram
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from backend.callbacks import update_anordnare_insights, update_dashboard, update_studerande
+from backend.figure_cache import FIGURE_CACHE
+from backend.instrumentation import METRICS, set_log_level
+from benchmarks.dataset import load_dataset, stand_in_state
+
+# Andel av filterändringarna per sida
+MIX = {"Översikt": 0.5, "Anordnare": 0.3, "Studenttrender": 0.2}
+
+def weighted_anordnare(data):
+    # Ungefär Zipf: den största anordnaren väljs oftast
+    choices = ["Alla"] + data.anordnare
+    weights = [1.0] + [1 / (rank + 1) for rank in range(len(data.anordnare))]
+    return choices, weights
+
+def change_filter(state, page, data, anordnare, rng):
+    # Ändrar ett filter på sidan och returnerar callbacken som ska köras
+    choices, weights = anordnare
+    if page == "Översikt":
+        name = rng.choice(["selected_year", "selected_type", "selected_anordnare"])
+        if name == "selected_year":
+            state.selected_year = rng.choice(data.years)
+        elif name == "selected_type":
+            state.selected_type = rng.choice(data.types)
+        else:
+            state.selected_anordnare = rng.choices(choices, weights)[0]
+        return update_dashboard
+
+    if page == "Anordnare":
+        if rng.random() < 0.5:
+            state.selected_year_insight = rng.choice(data.years)
+        else:
+            state.selected_anordnare_insight = rng.choices(choices, weights)[0]
+        return update_anordnare_insights
+
+    name = rng.choice(["selected_omrade", "selected_kon", "selected_alder", "selected_stud_year"])
+    options = {
+        "selected_omrade": data.omrade_list,
+        "selected_kon": data.kon_list,
+        "selected_alder": data.alder_list,
+        "selected_stud_year": data.stud_years,
+    }[name]
+    setattr(state, name, rng.choice(options))
+    return update_studerande
+
+def run_session(data, requests, think, seed, start, samples, errors):
+    rng = random.Random(seed)
+    state = stand_in_state(data)
+    anordnare = weighted_anordnare(data)
+    pages = list(MIX)
+    weights = list(MIX.values())
+
+    start.wait()
+    for _ in range(requests):
+        page = rng.choices(pages, weights)[0]
+        callback = change_filter(state, page, data, anordnare, rng)
+        began = time.perf_counter()
+        try:
+            callback(state)
+        except Exception as e:
+            errors.append(f"{callback.__name__}: {e}")
+            continue
+        samples.append((callback.__name__, time.perf_counter() - began))
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        value = round(latencies[0] * 1000, 1) if latencies else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value, "max_ms": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 1),
+        "p95_ms": round(cuts[94] * 1000, 1),
+        "p99_ms": round(cuts[98] * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+def simulate(data, sessions, requests=20, think_ms=0, seed=1, warm=False):
+    if not warm:
+        FIGURE_CACHE.reset(FIGURE_CACHE.version)
+
+    samples = []
+    errors = []
+    start = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(target=run_session, args=(data, requests, think_ms / 1000, seed * 1000 + n, start, samples, errors))
+        for n in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    callbacks = {}
+    for name in sorted({name for name, _ in samples}):
+        latencies = [latency for sample_name, latency in samples if sample_name == name]
+        callbacks[name] = dict(requests=len(latencies), **percentiles(latencies))
+
+    return dict(
+        sessions=sessions,
+        requests=len(samples),
+        errors=len(errors),
+        seconds=round(elapsed, 2),
+        throughput=round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        **percentiles([latency for _, latency in samples]),
+        callbacks=callbacks,
+        cache=FIGURE_CACHE.stats(),
+    )
+
+def print_report(levels):
+    print(f"{'Sessioner':>9} {'Anrop':>7} {'Anrop/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Max ms':>9} {'Fel':>5}")
+    for level in levels:
+        print(f"{level['sessions']:>9} {level['requests']:>7} {level['throughput']:>9.1f} {level['p50_ms']:>9.1f} "
+              f"{level['p95_ms']:>9.1f} {level['p99_ms']:>9.1f} {level['max_ms']:>9.1f} {level['errors']:>5}")
+
+    print("\nPer callback (p95 ms)")
+    names = sorted({name for level in levels for name in level["callbacks"]})
+    print(f"{'Sessioner':>9} " + " ".join(f"{name:>26}" for name in names))
+    for level in levels:
+        values = [level["callbacks"].get(name, {}).get("p95_ms", 0.0) for name in names]
+        print(f"{level['sessions']:>9} " + " ".join(f"{value:>26.1f}" for value in values))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lastsimulering av callbacks med samtidiga sessioner")
+    parser.add_argument("--sessions", default="1,2,4,8,16", help="antal samtidiga sessioner per nivå")
+    parser.add_argument("--requests", type=int, default=20, help="filterändringar per session")
+    parser.add_argument("--think-ms", type=float, default=0, help="medeltid mellan en sessions anrop")
+    parser.add_argument("--scale", type=int, default=1, help="syntetisk data i 1, 10 eller 100 gånger dagens storlek")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--warm", action="store_true", help="behåll figurcachen mellan nivåerna")
+    parser.add_argument("--json", type=Path, help="spara resultaten som JSON")
+    parser.add_argument("--metrics", type=Path, help="spara mätningarna från backend.instrumentation som JSON")
+    parser.add_argument("--log", action="store_true", help="logga varje callback med structlog")
+    args = parser.parse_args(argv)
+
+    if not args.log:
+        set_log_level("warning")
+
+    data = load_dataset(args.scale)
+    print(f"Skala x{args.scale}: {len(data.df)} rader, {len(data.anordnare)} anordnare\n")
+
+    levels = [
+        simulate(data, int(sessions), args.requests, args.think_ms, args.seed, args.warm)
+        for sessions in args.sessions.split(",")
+    ]
+    print_report(levels)
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "scale": args.scale,
+            "requests_per_session": args.requests,
+            "think_ms": args.think_ms,
+            "levels": levels,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.metrics:
+        METRICS.dump(args.metrics)
+
+if __name__ == "__main__":
+    main()
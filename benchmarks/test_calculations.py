@@ -0,0 +1,23 @@
+from backend.calculations import calculate_kpis, filter_data
+
+def test_filter_data_alla(bench, dataset):
+    result = bench("filter_data (Alla)", lambda: filter_data(dataset.cube, "Alla", "Alla", "Alla", dataset.cube_index))
+    assert len(result) == len(dataset.cube)
+
+def test_filter_data_anordnare(bench, dataset):
+    anordnare = dataset.anordnare[0]
+    result = bench("filter_data (2024, Kurs, anordnare)", lambda: filter_data(dataset.cube, "2024", "Kurs", anordnare, dataset.cube_index))
+    assert len(result) == len(filter_data(dataset.cube, "2024", "Kurs", anordnare))
+
+def test_filter_data_rows(bench, dataset):
+    # Radnivå, som Anordnare-sidan filtrerar
+    result = bench("filter_data (rader, 2023)", lambda: filter_data(dataset.df, "2023", "Alla", "Alla", dataset.df_index))
+    assert len(result) == len(filter_data(dataset.df, "2023", "Alla", "Alla"))
+
+def test_calculate_kpis_cube(bench, dataset):
+    total_ansokningar, _, _, _ = bench("calculate_kpis (kub)", lambda: calculate_kpis(dataset.cube))
+    assert total_ansokningar == len(dataset.df)
+
+def test_calculate_kpis_rows(bench, dataset):
+    total_ansokningar, _, _, _ = bench("calculate_kpis (rader)", lambda: calculate_kpis(dataset.df))
+    assert total_ansokningar == len(dataset.df)
@@ -0,0 +1,42 @@
+from backend.calculations import filter_data
+from backend.callbacks import update_anordnare_insights, update_dashboard, update_studerande
+from backend.figure_cache import FIGURE_CACHE
+from backend.regions import region_codes
+from benchmarks.dataset import stand_in_state
+from frontend.map_charts import create_map
+
+# Callbacks returnerar inget, de skriver till state som kontrolleras efteråt
+
+def clear_cache():
+    FIGURE_CACHE.reset(FIGURE_CACHE.version)
+
+def test_update_dashboard(bench, dataset):
+    state = stand_in_state(dataset)
+    bench("update_dashboard", lambda: update_dashboard(state), setup=clear_cache)
+    assert state.total_ansokningar == len(dataset.df)
+
+def test_update_dashboard_cached(bench, dataset):
+    state = stand_in_state(dataset)
+    update_dashboard(state)
+    bench("update_dashboard (cache)", lambda: update_dashboard(state))
+    assert state.total_ansokningar == len(dataset.df)
+
+def test_update_dashboard_anordnare(bench, dataset):
+    state = stand_in_state(dataset, selected_year="2024", selected_anordnare=dataset.anordnare[0])
+    bench("update_dashboard (anordnare)", lambda: update_dashboard(state), setup=clear_cache)
+    assert state.total_ansokningar == len(filter_data(dataset.df, "2024", "Alla", dataset.anordnare[0]))
+
+def test_update_anordnare_insights(bench, dataset):
+    state = stand_in_state(dataset, selected_anordnare_insight=dataset.anordnare[0])
+    bench("update_anordnare_insights", lambda: update_anordnare_insights(state), setup=clear_cache)
+    assert state.anordnare_total_ansokningar == len(filter_data(dataset.df, "Alla", "Alla", dataset.anordnare[0]))
+
+def test_update_studerande(bench, dataset):
+    state = stand_in_state(dataset)
+    bench("update_studerande", lambda: update_studerande(state), setup=clear_cache)
+    assert list(state.studerande_table.columns) == ['År', 'Antal aktiva studenter']
+    assert len(state.studerande_table) > 0
+
+def test_create_map(bench, dataset):
+    fig = bench("create_map", lambda: create_map(dataset.cube))
+    assert len(fig.data[0].locations) == len(region_codes())
@@ -0,0 +1,52 @@
+"""Kuben och positionsindexet ska ge samma svar som filtrering av rådata.
+
+Kontrolleras på den syntetiska datan för varje kombination av år, typ och
+anordnare (plus en anordnare som inte finns), mot filter_data på raderna.
+"""
+import pandas as pd
+
+from backend.calculations import calculate_kpis, filter_data
+from backend.data_model import build_position_index, count_by
+
+# Grupperingar som diagrammen på Översikt och Karta gör på kuben
+CHART_GROUPS = ['Utbildningsområde', 'Län', 'Typ', ['Utbildningsområde', 'Beslut'], ['År', 'Typ']]
+
+def combinations(dataset):
+    for year in dataset.years:
+        for typ in dataset.types:
+            for anordnare in ["Alla", "Finns inte"] + dataset.anordnare:
+                yield year, typ, anordnare
+
+def test_cube_matches_rows(dataset):
+    # Nyckeltal och diagrammens grupperingar, varje urval filtreras en gång
+    for year, typ, anordnare in combinations(dataset):
+        combination = f"{year}/{typ}/{anordnare}"
+        rows = filter_data(dataset.df, year, typ, anordnare)
+        cells = filter_data(dataset.cube, year, typ, anordnare)
+
+        assert calculate_kpis(cells) == calculate_kpis(rows), combination
+        for by in CHART_GROUPS:
+            assert count_by(cells, by).to_dict() == count_by(rows, by).to_dict(), f"{by} {combination}"
+
+def test_index_matches_row_filter(dataset):
+    # Samma rader i samma ordning, både för rådata och kuben
+    for data, index in ((dataset.df, dataset.df_index), (dataset.cube, dataset.cube_index)):
+        for year, typ, anordnare in combinations(dataset):
+            expected = filter_data(data, year, typ, anordnare)
+            result = filter_data(data, year, typ, anordnare, index)
+            pd.testing.assert_frame_equal(result, expected, obj=f"{year}/{typ}/{anordnare}")
+
+def test_index_skips_missing_values(dataset):
+    # Rader utan anordnare eller typ har kod -1, precis som ett okänt värde.
+    # Mask-filtret väljer dem aldrig, så indexet får inte heller göra det.
+    data = dataset.df.copy()
+    data.loc[data.index[::7], 'Anordnare namn'] = None
+    data.loc[data.index[::11], 'Typ'] = None
+    index = build_position_index(data)
+
+    for year in dataset.years:
+        for typ in dataset.types + ["Okänd"]:
+            for anordnare in ["Alla", "Finns inte"] + dataset.anordnare[:20]:
+                expected = filter_data(data, year, typ, anordnare)
+                result = filter_data(data, year, typ, anordnare, index)
+                pd.testing.assert_frame_equal(result, expected, obj=f"{year}/{typ}/{anordnare}")
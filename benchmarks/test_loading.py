@@ -0,0 +1,25 @@
+from backend.data_loader import load_all_data, load_studerande_data
+from backend.cube import build_cube
+from benchmarks.dataset import in_directory
+
+def test_load_all_data_excel(bench, dataset):
+    # Utan snapshot: varje arbetsbok läses från Excel
+    with in_directory(dataset.root):
+        df = bench("load_all_data (Excel)", lambda: load_all_data(use_snapshot=False), rounds=1)
+    assert df.shape == dataset.df.shape
+
+def test_load_all_data_snapshot(bench, dataset):
+    with in_directory(dataset.root):
+        df = bench("load_all_data (snapshot)", load_all_data)
+    assert df.shape == dataset.df.shape
+
+def test_load_studerande_data(bench, dataset):
+    with in_directory(dataset.root):
+        stud_store, omrade_list = bench("load_studerande_data", load_studerande_data)
+    assert stud_store.values.shape == dataset.stud_store.values.shape
+    assert omrade_list == dataset.omrade_list
+
+def test_build_cube(bench, dataset):
+    cube = bench("build_cube", lambda: build_cube(dataset.df))
+    assert cube.shape == dataset.cube.shape
+    assert cube['Antal'].sum() == len(dataset.df)
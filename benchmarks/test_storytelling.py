@@ -0,0 +1,27 @@
+from backend.storytelling_charts import (
+    create_storytelling_approval_by_area, create_storytelling_datait_trend,
+    create_storytelling_geographic_opportunity, create_storytelling_graduation_rate, graduation_slice
+)
+
+# Varje diagram ritas i 300 dpi som i build_storytelling, en körning räcker
+
+def check_saved(fig, path):
+    assert fig.axes
+    assert path.stat().st_size > 0
+
+def test_approval_by_area(bench, dataset, tmp_path):
+    fig = bench("storytelling 1 (områden)", lambda: create_storytelling_approval_by_area(dataset.df, save_path=tmp_path / "1.png"), rounds=1)
+    check_saved(fig, tmp_path / "1.png")
+
+def test_datait_trend(bench, dataset, tmp_path):
+    fig = bench("storytelling 2 (trend)", lambda: create_storytelling_datait_trend(dataset.df, save_path=tmp_path / "2.png"), rounds=1)
+    check_saved(fig, tmp_path / "2.png")
+
+def test_geographic_opportunity(bench, dataset, tmp_path):
+    fig = bench("storytelling 3 (län)", lambda: create_storytelling_geographic_opportunity(dataset.df, save_path=tmp_path / "3.png"), rounds=1)
+    check_saved(fig, tmp_path / "3.png")
+
+def test_graduation_rate(bench, dataset, tmp_path):
+    data = graduation_slice(dataset.stud_store)
+    fig = bench("storytelling 4 (examensgrad)", lambda: create_storytelling_graduation_rate(data, save_path=tmp_path / "4.png"), rounds=1)
+    check_saved(fig, tmp_path / "4.png")
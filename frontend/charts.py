@@ -1,9 +1,21 @@
+from functools import lru_cache
+
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-
+from backend.calculations import examensgrad_series, get_examensgrad_trend, organizer_area_stats
+from backend.data_model import count_by
+from backend.instrumentation import timed_builder
+from backend.studerande_store import VALUE_COLUMN
+
+@lru_cache(maxsize=1)
+def px():
+    # plotly.express tar en tiondels sekund att ladda och behövs inte förrän första figuren byggs
+    import plotly.express
+    return plotly.express
+
+@timed_builder
 def create_bar_chart(data):
-    grouped = data.groupby('Utbildningsområde').size().reset_index(name='Antal')
+    grouped = count_by(data, 'Utbildningsområde').reset_index(name='Antal')
     grouped = grouped.sort_values('Antal', ascending=False).head(10)
 
     if len(grouped) == 0:
@@ -17,7 +29,7 @@ def create_bar_chart(data):
         fig.update_layout(height=500)
         return fig
 
-    fig = px.bar(
+    fig = px().bar(
         grouped,
         x='Utbildningsområde',
         y='Antal',
@@ -41,8 +53,9 @@ def create_bar_chart(data):
 
     return fig
 
+@timed_builder
 def create_pie_chart(data):
-    beslut_counts = data['Beslut'].value_counts().reset_index()
+    beslut_counts = count_by(data, 'Beslut').sort_values(ascending=False).reset_index()
     beslut_counts.columns = ['Beslut', 'Antal']
 
     if len(beslut_counts) == 0:
@@ -81,17 +94,18 @@ def create_pie_chart(data):
 
     return fig
 
+@timed_builder
 def create_stacked_bar_chart(data):
-    grouped = data.groupby(['Utbildningsområde', 'Typ']).size().reset_index(name='Antal')
-    top_areas = data.groupby('Utbildningsområde').size().sort_values(ascending=False).head(10).index
+    grouped = count_by(data, ['Utbildningsområde', 'Typ']).reset_index(name='Antal')
+    top_areas = count_by(data, 'Utbildningsområde').sort_values(ascending=False).head(10).index
     grouped = grouped[grouped['Utbildningsområde'].isin(top_areas)]
 
     # Beräkna totalt per område och procentsatser
-    totals = grouped.groupby('Utbildningsområde')['Antal'].sum().to_dict()
+    totals = grouped.groupby('Utbildningsområde', observed=True)['Antal'].sum().to_dict()
     grouped['Totalt'] = grouped['Utbildningsområde'].map(totals)
     grouped['Procent'] = (grouped['Antal'] / grouped['Totalt'] * 100).round(1)
 
-    fig = px.bar(
+    fig = px().bar(
         grouped,
         x='Utbildningsområde',
         y='Antal',
@@ -114,17 +128,18 @@ def create_stacked_bar_chart(data):
 
     return fig
 
+@timed_builder
 def create_beslut_bar_chart(data):
-    grouped = data.groupby(['Utbildningsområde', 'Beslut']).size().reset_index(name='Antal')
-    top_areas = data.groupby('Utbildningsområde').size().sort_values(ascending=False).head(10).index
+    grouped = count_by(data, ['Utbildningsområde', 'Beslut']).reset_index(name='Antal')
+    top_areas = count_by(data, 'Utbildningsområde').sort_values(ascending=False).head(10).index
     grouped = grouped[grouped['Utbildningsområde'].isin(top_areas)]
 
     # Beräkna totalt per område och procentsatser
-    totals = grouped.groupby('Utbildningsområde')['Antal'].sum().to_dict()
+    totals = grouped.groupby('Utbildningsområde', observed=True)['Antal'].sum().to_dict()
     grouped['Totalt'] = grouped['Utbildningsområde'].map(totals)
     grouped['Procent'] = (grouped['Antal'] / grouped['Totalt'] * 100).round(1)
 
-    fig = px.bar(
+    fig = px().bar(
         grouped,
         x='Utbildningsområde',
         y='Antal',
@@ -147,6 +162,7 @@ def create_beslut_bar_chart(data):
 
     return fig
 
+@timed_builder
 def create_godkannande_comparison_chart(data, anordnare_name):
     total_all = len(data)
     beviljade_all = len(data[data['Beslut'] == 'Beviljad'])
@@ -164,7 +180,7 @@ def create_godkannande_comparison_chart(data, anordnare_name):
 
     colors = ['#94a3b8', '#10b981' if anordnare_godkand >= avg_godkand else '#ef4444']
 
-    fig = px.bar(
+    fig = px().bar(
         comparison_df,
         x='Kategori',
         y='Godkännandegrad (%)',
@@ -187,35 +203,13 @@ def create_godkannande_comparison_chart(data, anordnare_name):
 
     return fig
 
-def create_ranking_chart(data, anordnare_name):
-    anordnare_stats = []
-
-    for anordnare in data['Anordnare namn'].unique():
-        if pd.isna(anordnare):
-            continue
-
-        anordnare_data = data[data['Anordnare namn'] == anordnare]
-        total = len(anordnare_data)
-
-        if total < 5:
-            continue
-
-        beviljade = len(anordnare_data[anordnare_data['Beslut'] == 'Beviljad'])
-        godkand_procent = round((beviljade / total * 100), 1) if total > 0 else 0
-
-        anordnare_stats.append({
-            'Anordnare': anordnare,
-            'Godkännandegrad (%)': godkand_procent,
-            'Ansökningar': total
-        })
+@timed_builder
+def create_ranking_chart(ranking, anordnare_name):
+    top_10 = ranking.head(10)
 
-    all_ranking_df = pd.DataFrame(anordnare_stats).sort_values('Godkännandegrad (%)', ascending=False)
-
-    top_10 = all_ranking_df.head(10)
-
-    if anordnare_name not in top_10['Anordnare'].values:
-        selected_row = all_ranking_df[all_ranking_df['Anordnare'] == anordnare_name].copy()
-        if len(selected_row) > 0:
+    if anordnare_name not in top_10.index:
+        if anordnare_name in ranking.index:
+            selected_row = ranking.loc[[anordnare_name]]
             gap_row = pd.DataFrame({
                 'Anordnare': ['...'],
                 'Godkännandegrad (%)': [0],
@@ -243,7 +237,7 @@ def create_ranking_chart(data, anordnare_name):
         else:
             text_labels.append(f"{row['Godkännandegrad (%)']}%")
 
-    fig = px.bar(
+    fig = px().bar(
         ranking_df,
         x='Anordnare',
         y='Godkännandegrad (%)',
@@ -268,29 +262,11 @@ def create_ranking_chart(data, anordnare_name):
 
     return fig
 
-def create_styrkor_svagheter_charts(data, anordnare_name):
-    anordnare_data = data[data['Anordnare namn'] == anordnare_name]
-
-    omrade_stats = []
-
-    for omrade in anordnare_data['Utbildningsområde'].unique():
-        if pd.isna(omrade):
-            continue
-
-        omrade_data = anordnare_data[anordnare_data['Utbildningsområde'] == omrade]
-        total = len(omrade_data)
-
-        beviljade = len(omrade_data[omrade_data['Beslut'] == 'Beviljad'])
-        godkand_procent = round((beviljade / total * 100), 1) if total > 0 else 0
+@timed_builder
+def create_styrkor_svagheter_charts(area_stats, anordnare_name):
+    omrade_df = organizer_area_stats(area_stats, anordnare_name)
 
-        omrade_stats.append({
-            'Utbildningsområde': omrade,
-            'Godkännandegrad (%)': godkand_procent,
-            'Ansökningar': total,
-            'Beviljade': beviljade
-        })
-
-    if len(omrade_stats) == 0:
+    if len(omrade_df) == 0:
         empty_fig = go.Figure()
         empty_fig.add_annotation(
             text="Ingen tillräcklig data (minst 3 ansökningar per område krävs)",
@@ -301,17 +277,16 @@ def create_styrkor_svagheter_charts(data, anordnare_name):
         empty_fig.update_layout(height=400)
         return empty_fig, empty_fig
 
-    omrade_df = pd.DataFrame(omrade_stats).sort_values('Godkännandegrad (%)', ascending=False)
+    omrade_df = omrade_df.sort_values('Godkännandegrad (%)', ascending=False, kind='stable')
 
     if len(omrade_df) == 1:
         row = omrade_df.iloc[0]
         omrade_namn = row['Utbildningsområde']
         anordnare_rate = row['Godkännandegrad (%)']
 
-        omrade_all_data = data[data['Utbildningsområde'] == omrade_namn]
-        total_omrade = len(omrade_all_data)
-        beviljade_omrade = len(omrade_all_data[omrade_all_data['Beslut'] == 'Beviljad'])
-        omrade_avg = round((beviljade_omrade / total_omrade * 100), 1) if total_omrade > 0 else 0
+        _, area_averages = area_stats
+        total_omrade = int(area_averages.at[omrade_namn, 'Ansökningar'])
+        omrade_avg = area_averages.at[omrade_namn, 'Godkännandegrad (%)']
 
         if anordnare_rate >= 70:
             color = '#10b981'
@@ -415,33 +390,102 @@ def create_styrkor_svagheter_charts(data, anordnare_name):
 
         return fig, fig
 
-def create_studerande_chart(omrade, df_stud_filtered):
-    if df_stud_filtered.empty:
+@timed_builder
+def create_omrade_jamforelse_chart(area_stats, anordnare_name):
+    omrade_df = organizer_area_stats(area_stats, anordnare_name)
+
+    if len(omrade_df) == 0:
         fig = go.Figure()
         fig.add_annotation(
-            text="Ingen data tillgänglig",
+            text="Ingen data att visa för vald anordnare",
             xref="paper", yref="paper",
             x=0.5, y=0.5, showarrow=False,
-            font=dict(size=16)
+            font=dict(size=14)
         )
+        fig.update_layout(height=400)
         return fig
 
-    data_omrade = df_stud_filtered[df_stud_filtered['utbildningens inriktning'] == omrade].copy()
-    data_omrade['år'] = data_omrade['år'].astype(int)
+    _, area_averages = area_stats
+    omrade_df = omrade_df.sort_values('Godkännandegrad (%)', ascending=True, kind='stable')
+    snitt = area_averages.loc[omrade_df['Utbildningsområde']]
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=snitt['Godkännandegrad (%)'],
+        y=omrade_df['Utbildningsområde'],
+        orientation='h',
+        name='Områdesgenomsnitt',
+        marker=dict(color='#94a3b8'),
+        customdata=snitt[['Ansökningar']],
+        hovertemplate='<b>Genomsnitt för %{y}</b><br>Godkänd: %{x}%<br>Baserat på %{customdata[0]} ansökningar<extra></extra>'
+    ))
+
+    fig.add_trace(go.Bar(
+        x=omrade_df['Godkännandegrad (%)'],
+        y=omrade_df['Utbildningsområde'],
+        orientation='h',
+        name=anordnare_name,
+        marker=dict(color='#3b82f6'),
+        customdata=omrade_df[['Ansökningar', 'Beviljade']],
+        hovertemplate=f'<b>{anordnare_name}</b><br>%{{y}}<br>Godkänd: %{{x}}%<br>Ansökningar: %{{customdata[0]}}<br>Beviljade: %{{customdata[1]}}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f"{anordnare_name} vs områdesgenomsnitt",
+        xaxis_title="Godkännandegrad (%)",
+        yaxis_title="",
+        height=250 + max(len(omrade_df) - 3, 0) * 50,
+        margin=dict(l=250, r=50, t=60, b=50),
+        xaxis=dict(range=[0, 100]),
+        barmode='group',
+        bargap=0.2,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+
+    return fig
+
+def studerande_frame(store, omrade, tabell, kon='totalt', alder='totalt'):
+    # En rad per år med uppgift, som de gamla CSV-filtren gav
+    values = store.series(omrade, tabell, kon, alder).dropna().astype(int)
+    return pd.DataFrame({'år': values.index.astype(int), VALUE_COLUMN: values.to_numpy()})
+
+def selection_label(kon, alder):
+    # Tom för totalen så att standardvyns rubriker är oförändrade
+    parts = [value for value in (kon, alder) if value != 'totalt']
+    return f" ({', '.join(parts)})" if parts else ""
 
-    # Remove ".." values and convert to numeric
-    data_omrade = data_omrade[data_omrade['Studerande och examinerade inom yrkeshögskolan'] != '..']
-    data_omrade['Studerande och examinerade inom yrkeshögskolan'] = pd.to_numeric(
-        data_omrade['Studerande och examinerade inom yrkeshögskolan']
+def message_figure(text):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=text,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=16)
     )
+    return fig
+
+def no_data_figure():
+    return message_figure("Ingen data tillgänglig")
 
-    data_omrade = data_omrade.sort_values('år')
+def loading_figure():
+    # Platshållare tills sidans figurer är framräknade
+    return message_figure("Laddar...")
 
-    fig = px.line(
+@timed_builder
+def create_studerande_chart(omrade, store, kon='totalt', alder='totalt'):
+    if store.empty:
+        return no_data_figure()
+
+    data_omrade = studerande_frame(store, omrade, 'Antal studerande', kon, alder)
+
+    fig = px().line(
         data_omrade,
         x='år',
         y='Studerande och examinerade inom yrkeshögskolan',
-        title=f'Totalt antal aktiva studenter inom {omrade} (2005-2024)',
+        title=f'Totalt antal aktiva studenter inom {omrade}{selection_label(kon, alder)} (2005-2024)',
         labels={
             'år': 'År',
             'Studerande och examinerade inom yrkeshögskolan': 'Antal aktiva studenter'
@@ -457,29 +501,18 @@ def create_studerande_chart(omrade, df_stud_filtered):
 
     return fig
 
-def create_examinerade_chart(omrade):
-    df_exam = pd.read_csv("data/raw/studerande_utbildningsomrade_overtid.csv", encoding='ISO-8859-1')
+@timed_builder
+def create_examinerade_chart(omrade, store, kon='totalt', alder='totalt'):
+    if store.empty:
+        return no_data_figure()
 
-    data_exam = df_exam[
-        (df_exam['kön'] == 'totalt') &
-        (df_exam['utbildningens inriktning'] == omrade) &
-        (df_exam['tabellinnehåll'] == 'Antal examinerade') &
-        (df_exam['ålder'] == 'totalt')
-    ].copy()
+    data_exam = studerande_frame(store, omrade, 'Antal examinerade', kon, alder)
 
-    data_exam['år'] = data_exam['år'].astype(int)
-    data_exam = data_exam.sort_values('år')
-
-    data_exam = data_exam[data_exam['Studerande och examinerade inom yrkeshögskolan'] != '..']
-    data_exam['Studerande och examinerade inom yrkeshögskolan'] = pd.to_numeric(
-        data_exam['Studerande och examinerade inom yrkeshögskolan']
-    )
-
-    fig = px.line(
+    fig = px().line(
         data_exam,
         x='år',
         y='Studerande och examinerade inom yrkeshögskolan',
-        title=f'Antal examinerade studenter inom {omrade} (2007-2024)',
+        title=f'Antal examinerade studenter inom {omrade}{selection_label(kon, alder)} (2007-2024)',
         labels={
             'år': 'År',
             'Studerande och examinerade inom yrkeshögskolan': 'Antal examinerade'
@@ -495,45 +528,18 @@ def create_examinerade_chart(omrade):
 
     return fig
 
-def create_comparison_chart(omrade):
-    df_all = pd.read_csv("data/raw/studerande_utbildningsomrade_overtid.csv", encoding='ISO-8859-1')
-
-    data_stud = df_all[
-        (df_all['kön'] == 'totalt') &
-        (df_all['utbildningens inriktning'] == omrade) &
-        (df_all['tabellinnehåll'] == 'Antal studerande') &
-        (df_all['ålder'] == 'totalt')
-    ].copy()
-
-    data_exam = df_all[
-        (df_all['kön'] == 'totalt') &
-        (df_all['utbildningens inriktning'] == omrade) &
-        (df_all['tabellinnehåll'] == 'Antal examinerade') &
-        (df_all['ålder'] == 'totalt')
-    ].copy()
-
-    data_stud['år'] = data_stud['år'].astype(int)
-    data_exam['år'] = data_exam['år'].astype(int)
-
-    data_stud = data_stud[data_stud['Studerande och examinerade inom yrkeshögskolan'] != '..']
-    data_stud['Studerande och examinerade inom yrkeshögskolan'] = pd.to_numeric(
-        data_stud['Studerande och examinerade inom yrkeshögskolan']
-    )
-
-    data_exam = data_exam[data_exam['Studerande och examinerade inom yrkeshögskolan'] != '..']
-    data_exam['Studerande och examinerade inom yrkeshögskolan'] = pd.to_numeric(
-        data_exam['Studerande och examinerade inom yrkeshögskolan']
-    )
+@timed_builder
+def create_comparison_chart(omrade, store, matrix, kon='totalt', alder='totalt'):
+    if store.empty:
+        return no_data_figure()
 
-    merged = pd.merge(
-        data_stud[['år', 'Studerande och examinerade inom yrkeshögskolan']],
-        data_exam[['år', 'Studerande och examinerade inom yrkeshögskolan']],
-        on='år',
-        suffixes=('_stud', '_exam')
-    )
+    data_stud = studerande_frame(store, omrade, 'Antal studerande', kon, alder)
+    data_exam = studerande_frame(store, omrade, 'Antal examinerade', kon, alder)
 
-    merged['examensgrad'] = (merged['Studerande och examinerade inom yrkeshögskolan_exam'] /
-                              merged['Studerande och examinerade inom yrkeshögskolan_stud'] * 100).round(1)
+    if kon == 'totalt' and alder == 'totalt':
+        examensgrad = get_examensgrad_trend(matrix, omrade)
+    else:
+        examensgrad = examensgrad_series(store, omrade, kon, alder)
 
     fig = go.Figure()
 
@@ -558,8 +564,8 @@ def create_comparison_chart(omrade):
     ))
 
     fig.add_trace(go.Scatter(
-        x=merged['år'],
-        y=merged['examensgrad'],
+        x=examensgrad.index.astype(int),
+        y=examensgrad.to_numpy(),
         mode='lines+markers',
         name='Examensgrad (%)',
         line=dict(width=3, color='#f59e0b', dash='dash'),
@@ -569,7 +575,7 @@ def create_comparison_chart(omrade):
     ))
 
     fig.update_layout(
-        title=f'Aktiva studenter, Examinerade och Examensgrad inom {omrade} (2007-2024)',
+        title=f'Aktiva studenter, Examinerade och Examensgrad inom {omrade}{selection_label(kon, alder)} (2007-2024)',
         xaxis_title='År',
         yaxis_title='Antal studenter',
         yaxis2=dict(
@@ -592,20 +598,40 @@ def create_comparison_chart(omrade):
 
     return fig
 
-def create_studerande_table(omrade, df_stud_filtered):
-    if df_stud_filtered.empty:
+@timed_builder
+def create_studerande_table(omrade, store, kon='totalt', alder='totalt'):
+    if store.empty:
         return pd.DataFrame({'Meddelande': ['Ingen data tillgänglig']})
 
-    data_omrade = df_stud_filtered[df_stud_filtered['utbildningens inriktning'] == omrade].copy()
+    data_omrade = studerande_frame(store, omrade, 'Antal studerande', kon, alder)
 
-    # Remove ".." values and convert to numeric
-    data_omrade = data_omrade[data_omrade['Studerande och examinerade inom yrkeshögskolan'] != '..']
-    data_omrade['Studerande och examinerade inom yrkeshögskolan'] = pd.to_numeric(
-        data_omrade['Studerande och examinerade inom yrkeshögskolan']
-    )
-
-    table_data = data_omrade[['år', 'Studerande och examinerade inom yrkeshögskolan']].copy()
+    table_data = data_omrade[['år', VALUE_COLUMN]].copy()
     table_data.columns = ['År', 'Antal aktiva studenter']
     table_data = table_data.sort_values('År', ascending=False)
 
     return table_data
+
+def create_latency_chart(summary):
+    # Utan @timed_builder, som update_prestanda: sidan ska inte mäta sig själv
+    if not summary or not summary['count']:
+        return message_figure("Inga mätningar ännu")
+
+    limits = summary['buckets_ms']
+    labels = [f"≤ {limit} ms" for limit in limits] + [f"> {limits[-1]} ms"]
+
+    fig = go.Figure(go.Bar(
+        x=labels,
+        y=summary['counts'],
+        marker_color='#3b82f6',
+        hovertemplate='<b>%{x}</b><br>%{y} anrop<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f"{summary['name']}: {summary['count']} anrop, p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms",
+        xaxis_title="Svarstid",
+        yaxis_title="Antal anrop",
+        height=400,
+        margin=dict(l=50, r=50, t=80, b=80)
+    )
+
+    return fig
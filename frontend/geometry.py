@@ -0,0 +1,203 @@
+"""Länsgeometrin för kartan, inläst en gång och förenklad i flera nivåer.
+
+Förenklingen bevarar topologin på samma sätt som TopoJSON: ringarna delas upp
+i bågar vid de hörn där uppsättningen grannar ändras, och varje gemensam båge
+förenklas en gång (Douglas-Peucker) och används av båda länen. Gränserna
+mellan län förblir därför exakt gemensamma, utan glipor eller överlapp.
+
+Kartan skickar inte geometrin i varje figur. Den förenklade nivån skrivs till
+en fil med innehållshash i namnet som GUI:t serverar under GEO_URL_PREFIX, och
+figuren pekar bara på dess URL. Webbläsaren hämtar den en gång och behåller den.
+
+    python -m frontend.geometry    # jämför nivåerna: storlek och renderingstid
+"""
+import hashlib
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from backend.regions import load_full_geojson, region_codes
+
+GEO_DIR = Path("data/cache/geo")
+GEO_URL_PREFIX = "geo"
+
+# Tolerans i grader och antal decimaler per nivå. Vid zoom 3.6 (512 px-rutor)
+# är en skärmpixel ca 0.058 grader i longitud och ca 0.026-0.029 grader i
+# latitud (60-63° N). "medium" håller sig under en pixel och används i
+# kartan. "light" flyttar gränser upp till 1-2 px, vilket syns längs kusten.
+LEVELS = {
+    "full": (0, None),
+    "detailed": (0.005, 4),
+    "medium": (0.02, 3),
+    "light": (0.05, 3),
+}
+MAP_LEVEL = "medium"
+
+@lru_cache(maxsize=None)
+def load_geojson(level=MAP_LEVEL):
+    tolerance, precision = LEVELS[level]
+    if tolerance == 0:
+        return load_full_geojson()
+    return simplify_geojson(load_full_geojson(), tolerance, precision)
+
+@lru_cache(maxsize=None)
+def geojson_url(level=MAP_LEVEL):
+    content = json.dumps(load_geojson(level), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    name = f"swedish_regions-{level}-{hashlib.sha256(content).hexdigest()[:12]}.geojson"
+
+    path = GEO_DIR / name
+    if not path.exists():
+        GEO_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(content)
+        tmp.replace(path)
+
+    return f"/{GEO_URL_PREFIX}/{name}"
+
+def polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+def segment_distance(point, start, end):
+    px, py = point
+    ax, ay = start
+    bx, by = end
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    if length == 0:
+        return ((px - ax) ** 2 + (py - ay) ** 2) ** 0.5
+    t = max(0, min(1, ((px - ax) * dx + (py - ay) * dy) / length))
+    return ((px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2) ** 0.5
+
+def douglas_peucker(points, tolerance):
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance, index = 0, None
+        for i in range(first + 1, last):
+            distance = segment_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+def simplify_geojson(geojson, tolerance, precision):
+    # Alla ringar utan den upprepade slutpunkten, som tupler för uppslag
+    rings = []
+    for feature in geojson["features"]:
+        for polygon in polygons(feature["geometry"]):
+            for ring in polygon:
+                rings.append([tuple(point) for point in ring[:-1]])
+
+    owners = {}
+    for ring_id, ring in enumerate(rings):
+        for point in ring:
+            owners.setdefault(point, set()).add(ring_id)
+
+    # Ett hörn är en knutpunkt om dess grannuppsättning skiljer sig från
+    # föregående eller nästa hörns i någon ring
+    junctions = set()
+    for ring in rings:
+        for i, point in enumerate(ring):
+            if owners[point] != owners[ring[i - 1]] or owners[point] != owners[ring[(i + 1) % len(ring)]]:
+                junctions.add(point)
+
+    arc_cache = {}
+
+    def simplify_arc(arc):
+        reverse = arc[::-1]
+        canonical = min(arc, reverse)
+        if canonical not in arc_cache:
+            arc_cache[canonical] = douglas_peucker(canonical, tolerance)
+        simplified = arc_cache[canonical]
+        return simplified if canonical == arc else simplified[::-1]
+
+    def simplify_ring(ring):
+        cuts = [i for i, point in enumerate(ring) if point in junctions]
+        if not cuts:
+            # Ö eller ring utan grannar: dela vid minsta hörnet och hörnet längst bort från det
+            start = ring.index(min(ring))
+            ring = ring[start:] + ring[:start]
+            far = max(range(len(ring)), key=lambda i: (ring[i][0] - ring[0][0]) ** 2 + (ring[i][1] - ring[0][1]) ** 2)
+            cuts = [0, far] if far > 0 else [0]
+        else:
+            ring = ring[cuts[0]:] + ring[:cuts[0]]
+            cuts = [i - cuts[0] for i in cuts]
+
+        closed = ring + [ring[0]]
+        bounds = cuts + [len(ring)]
+        result = []
+        for start, end in zip(bounds, bounds[1:]):
+            result.extend(simplify_arc(tuple(closed[start:end + 1]))[:-1])
+        result.append(result[0])
+        return result
+
+    def round_ring(ring):
+        rounded = []
+        for x, y in ring:
+            point = [round(x, precision), round(y, precision)]
+            if not rounded or rounded[-1] != point:
+                rounded.append(point)
+        return rounded
+
+    features = []
+    for feature in geojson["features"]:
+        new_polygons = []
+        for polygon in polygons(feature["geometry"]):
+            new_rings = []
+            for ring in polygon:
+                simplified = round_ring(simplify_ring([tuple(point) for point in ring[:-1]]))
+                if len(simplified) >= 4:
+                    new_rings.append(simplified)
+                elif not new_rings:
+                    break
+            if new_rings:
+                new_polygons.append(new_rings)
+
+        if not new_polygons:
+            # Låt aldrig ett län försvinna helt - behåll originalet
+            new_polygons = polygons(feature["geometry"])
+
+        features.append({
+            "type": "Feature",
+            "properties": feature["properties"],
+            "geometry": {"type": "MultiPolygon", "coordinates": new_polygons},
+        })
+
+    return {"type": "FeatureCollection", "features": features}
+
+def vertex_count(geojson):
+    return sum(len(ring) for feature in geojson["features"] for polygon in polygons(feature["geometry"]) for ring in polygon)
+
+def benchmark(data):
+    from frontend.map_charts import create_map
+
+    print(f"{'Nivå':<10} {'Tolerans':>9} {'Hörn':>7} {'GeoJSON':>10} {'Figur':>10} {'Rendering':>10} {'Uppdatering':>12}")
+    for level, (tolerance, _) in LEVELS.items():
+        geojson = load_geojson(level)
+        geojson_bytes = len(json.dumps(geojson, separators=(",", ":")))
+
+        start = time.perf_counter()
+        payload = create_map(data, level=level, inline=True).to_json()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # Det som går över websocketen vid ett filterbyte när geometrin ligger kvar i webbläsaren
+        update = create_map(data, level=level).to_json()
+
+        print(f"{level:<10} {tolerance:>9} {vertex_count(geojson):>7} {geojson_bytes / 1000:>8.0f} kB {len(payload) / 1000:>8.0f} kB {elapsed:>7.0f} ms {len(update) / 1000:>9.1f} kB")
+
+if __name__ == "__main__":
+    from backend.data_loader import load_all_data
+
+    benchmark(load_all_data())
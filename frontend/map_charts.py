@@ -1,66 +1,34 @@
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
-import json
-from difflib import get_close_matches
+from functools import lru_cache
+from backend.data_model import codes, dimension_table, row_count
+from backend.instrumentation import timed_builder
+from backend.regions import county_lookup
+from frontend.geometry import MAP_LEVEL, geojson_url, load_geojson, region_codes
 
-def load_geojson():
-    with open("assets/swedish_regions.geojson", "r", encoding="utf-8") as file:
-        return json.load(file)
-
-def create_map(data):
-    geojson = load_geojson()
-
-    filtered = data[data['Län'].notna()].copy()
-    filtered = filtered[filtered['Län'] != 'Se "Lista flera kommuner"']
-
-    total_ansokningar = len(filtered)
-    beviljade_total = len(filtered[filtered['Beslut'] == 'Beviljad'])
-
-    properties = [feature["properties"] for feature in geojson["features"]]
-    region_codes = {
-        prop["name"]: prop["ref:se:länskod"] for prop in properties
-    }
-
-    all_lan = pd.DataFrame({
-        'Län': list(region_codes.keys()),
-        'Länskod': list(region_codes.values()),
-        'Beviljade': 0
-    })
-
-    lan_counts = filtered[filtered['Beslut'] == 'Beviljad'].groupby('Län').size().reset_index(name='Beviljade')
-
-    for _, row in lan_counts.iterrows():
-        lan_name = row['Län']
-        matches = get_close_matches(lan_name, region_codes.keys(), n=1, cutoff=0.6)
-        if matches:
-            matched_lan = matches[0]
-            all_lan.loc[all_lan['Län'] == matched_lan, 'Beviljade'] = row['Beviljade']
-
-    lan_data = all_lan
-    log_beviljade = np.log1p(lan_data['Beviljade'])
+@lru_cache(maxsize=None)
+def map_base(level=MAP_LEVEL, inline=False):
+    # Allt som inte beror på filtret: geometri, län, färgskala och layout
+    codes = region_codes()
+    geojson = load_geojson(level) if inline else geojson_url(level)
 
     fig = go.Figure(
         go.Choroplethmapbox(
             geojson=geojson,
-            locations=lan_data['Länskod'].tolist(),
-            z=log_beviljade,
+            locations=list(codes.values()),
             featureidkey="properties.ref:se:länskod",
             colorscale="Blues",
             marker_opacity=0.9,
             marker_line_width=0.4,
-            text=lan_data['Län'],
-            customdata=lan_data['Beviljade'],
+            text=list(codes.keys()),
             hovertemplate="<b>%{text}</b><br>Beviljade: %{customdata}<extra></extra>",
             showscale=False,
         )
     )
 
-    godkand_procent = round((beviljade_total / total_ansokningar * 100), 1) if total_ansokningar > 0 else 0
-
     fig.update_layout(
         title=dict(
-            text=f"<br>Beviljade ansökningar per län<br>Ju mörkare färg, desto fler beviljade<br><b>{beviljade_total}</b> av <b>{total_ansokningar}</b> beviljade ({godkand_procent}%)",
             x=0.05,
             y=0.95,
             font=dict(size=13),
@@ -77,3 +45,37 @@ def create_map(data):
     )
 
     return fig
+
+@timed_builder
+def create_map(data, level=MAP_LEVEL, inline=False):
+    filtered = data[data['Län'].notna()].copy()
+    filtered = filtered[filtered['Län'] != 'Se "Lista flera kommuner"']
+
+    total_ansokningar = row_count(filtered)
+    beviljade_total = row_count(filtered[filtered['Beslut'] == 'Beviljad'])
+
+    county_codes = list(region_codes().values())
+    lookup = county_lookup(dimension_table(data, 'Län'), county_codes)
+
+    beviljade = filtered[filtered['Beslut'] == 'Beviljad']
+    positions = lookup[codes(beviljade, 'Län')]
+    weights = beviljade['Antal'].to_numpy() if 'Antal' in beviljade.columns else None
+    known = positions >= 0
+    per_lan = np.bincount(
+        positions[known],
+        weights=weights[known] if weights is not None else None,
+        minlength=len(county_codes)
+    ).astype(int)
+
+    log_beviljade = np.log1p(per_lan)
+
+    godkand_procent = round((beviljade_total / total_ansokningar * 100), 1) if total_ansokningar > 0 else 0
+
+    # Kopian delar inte tillstånd med basfiguren, bara värdena och rubriken byts
+    fig = go.Figure(map_base(level, inline))
+    fig.update_traces(z=log_beviljade, customdata=per_lan)
+    fig.update_layout(
+        title_text=f"<br>Beviljade ansökningar per län<br>Ju mörkare färg, desto fler beviljade<br><b>{beviljade_total}</b> av <b>{total_ansokningar}</b> beviljade ({godkand_procent}%)"
+    )
+
+    return fig
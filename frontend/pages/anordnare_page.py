@@ -70,3 +70,11 @@ with tgb.Page() as anordnare_page:
         tgb.text("## Prestanda per utbildningsområde", mode="md")
         tgb.text("*Godkännandegrad per utbildningsområde för vald anordnare*", mode="md", class_name="text-muted")
         tgb.chart(figure="{styrkor_chart}")
+
+    tgb.html("br")
+
+    # JÄMFÖRELSE MOT OMRÅDESGENOMSNITT
+    with tgb.part(class_name="card"):
+        tgb.text("## Jämförelse mot områdesgenomsnitt", mode="md")
+        tgb.text("*Vald anordnares godkännandegrad jämfört med genomsnittet för alla anordnare, för varje område där anordnaren har sökt*", mode="md", class_name="text-muted")
+        tgb.chart(figure="{omrade_jamforelse_chart}")
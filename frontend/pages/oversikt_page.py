@@ -42,7 +42,7 @@ with tgb.Page() as oversikt_page:
 
         with tgb.part(class_name="card"):
             tgb.text("### Godkänd andel", mode="md")
-            tgb.text("# {godkand_procent}%", mode="md", class_name="text-primary")
+            tgb.text("# {godkand_procent}{'' if godkand_procent == '–' else '%'}", mode="md", class_name="text-primary")
 
         with tgb.part(class_name="card"):
             tgb.text("### Totala platser", mode="md")
@@ -0,0 +1,33 @@
+import taipy.gui.builder as tgb
+
+with tgb.Page() as prestanda_page:
+    tgb.navbar()
+
+    # Header
+    tgb.text("# Prestanda", mode="md", class_name="text-center")
+    tgb.text("**Svarstider för callbacks och diagram sedan servern startade**", mode="md", class_name="text-center")
+    tgb.text("*Adminsida. Figurstorlek och rader gäller anrop som byggde figurerna, cacheträffar bygger inget*", mode="md", class_name="text-center text-muted")
+    tgb.html("br")
+
+    with tgb.part(class_name="card"):
+        with tgb.layout(columns="1 1"):
+            with tgb.part():
+                tgb.button("Uppdatera", on_action="update_prestanda")
+            with tgb.part():
+                tgb.text("[Hämta som JSON](/prestanda.json)", mode="md")
+        tgb.text("{prestanda_cache_text}", mode="md")
+
+    tgb.html("br")
+
+    # TABELL
+    with tgb.part(class_name="card"):
+        tgb.text("## Alla mätningar", mode="md")
+        tgb.table(data="{prestanda_table}", page_size=25)
+
+    tgb.html("br")
+
+    # HISTOGRAM
+    with tgb.part(class_name="card"):
+        tgb.text("## Fördelning av svarstider", mode="md")
+        tgb.selector(value="{prestanda_name}", lov="{prestanda_names}", dropdown=True, filter=True, on_change="update_prestanda")
+        tgb.chart(figure="{prestanda_chart}")
@@ -1,4 +1,26 @@
 import taipy.gui.builder as tgb
+from backend.storytelling_assets import SIZES, image_sources
+
+def story_image(stem, alt):
+    sources = image_sources(stem)
+    if sources is None:
+        tgb.image(f"outputs/{stem}.png", width="100%")
+        return
+
+    # Webbläsaren väljer bredd efter skärmen och WebP om den stöds
+    with tgb.part(class_name="story-image"):
+        with tgb.html("picture"):
+            tgb.html("source", type="image/webp", srcSet=sources["webp"], sizes=SIZES)
+            tgb.html(
+                "img",
+                src=sources["src"],
+                srcSet=sources["png"],
+                sizes=SIZES,
+                width=sources["width"],
+                height=sources["height"],
+                loading="lazy",
+                alt=alt
+            )
 
 with tgb.Page() as storytelling_page:
     tgb.navbar()
@@ -12,7 +34,7 @@ with tgb.Page() as storytelling_page:
     with tgb.part(class_name="card"):
         tgb.text("### 1. Varför är Data/IT så svårt?", mode="md")
         tgb.text("*Godkännandegrad per utbildningsområde - Data/IT har lägst godkännandegrad trots flest ansökningar*", mode="md", class_name="text-muted")
-        tgb.image("outputs/storytelling_1_approval_by_area.png", width="100%")
+        story_image("storytelling_1_approval_by_area", "Godkännandegrad per utbildningsområde")
 
     tgb.html("br")
 
@@ -20,7 +42,7 @@ with tgb.Page() as storytelling_page:
     with tgb.part(class_name="card"):
         tgb.text("### 2. Blir Data/IT bättre eller sämre över tid?", mode="md")
         tgb.text("*Trend för Data/IT ansökningar och godkännandegrad 2022-2024*", mode="md", class_name="text-muted")
-        tgb.image("outputs/storytelling_2_datait_trend.png", width="100%")
+        story_image("storytelling_2_datait_trend", "Godkännandegrad för Data/IT över tid")
 
     tgb.html("br")
 
@@ -28,7 +50,7 @@ with tgb.Page() as storytelling_page:
     with tgb.part(class_name="card"):
         tgb.text("### 3. Var finns de bästa möjligheterna geografiskt?", mode="md")
         tgb.text("*Godkännandegrad per län för Data/IT - stora regionala skillnader*", mode="md", class_name="text-muted")
-        tgb.image("outputs/storytelling_3_geographic_opportunity.png", width="100%")
+        story_image("storytelling_3_geographic_opportunity", "Godkännandegrad per län för Data/IT")
 
     tgb.html("br")
 
@@ -36,6 +58,24 @@ with tgb.Page() as storytelling_page:
     with tgb.part(class_name="card"):
         tgb.text("### 4. Hur ser examensgraden ut?", mode="md")
         tgb.text("*Examensgrad per utbildningsområde - andel studenter som slutför sina studier*", mode="md", class_name="text-muted")
-        tgb.image("outputs/storytelling_4_graduation_rate.png", width="100%")
+        story_image("storytelling_4_graduation_rate", "Examensgrad per utbildningsområde")
 
     tgb.html("br")
+
+    # ===== UTFORSKA =====
+    with tgb.part(class_name="card"):
+        tgb.text("### 5. Utforska ett annat område", mode="md")
+        tgb.text("*Diagram 2 och 3 för valfritt utbildningsområde och minsta antal ansökningar per län*", mode="md", class_name="text-muted")
+
+        with tgb.layout(columns="2 1"):
+            with tgb.part():
+                tgb.text("**Utbildningsområde:**", mode="md")
+                tgb.selector(value="{story_omrade}", lov="{story_omraden}", dropdown=True, on_change="update_story_charts")
+
+            with tgb.part():
+                tgb.text("**Minst antal ansökningar per län:**", mode="md")
+                tgb.selector(value="{story_threshold}", lov="{story_thresholds}", dropdown=True, on_change="update_story_charts")
+
+        tgb.text("{story_status}", class_name="text-muted")
+        tgb.image("{story_trend_image}", width="100%")
+        tgb.image("{story_geo_image}", width="100%")
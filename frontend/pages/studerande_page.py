@@ -19,14 +19,33 @@ with tgb.Page() as studerande_page:
             on_change="update_studerande"
         )
 
+        with tgb.layout(columns="1 1"):
+            with tgb.part():
+                tgb.text("**Kön:**", mode="md")
+                tgb.selector(value="{selected_kon}", lov="{kon_list}", dropdown=True, on_change="update_studerande")
+
+            with tgb.part():
+                tgb.text("**Ålder:**", mode="md")
+                tgb.selector(value="{selected_alder}", lov="{alder_list}", dropdown=True, on_change="update_studerande")
+
     tgb.html("br")
 
     # KPI: Examensgrad statistik
     with tgb.part(class_name="card"):
-        tgb.text("### Examensgrad-statistik (2024)", mode="md")
+        tgb.text("### Examensgrad-statistik ({selected_stud_year})", mode="md")
         tgb.text("*Examensgrad = Antal examinerade / Antal aktiva studenter*", mode="md", class_name="text-muted")
         tgb.html("br")
 
+        tgb.text("**Välj år:**", mode="md")
+        tgb.selector(
+            value="{selected_stud_year}",
+            lov="{stud_years}",
+            dropdown=True,
+            on_change="update_examensgrad"
+        )
+
+        tgb.html("br")
+
         # Visa valt områdes examensgrad
         tgb.text("**{selected_omrade}:** {examensgrad_selected}%", mode="md", class_name="text-primary")
 
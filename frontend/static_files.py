@@ -0,0 +1,37 @@
+"""Flask-app för GUI:t med rutter för filer som har innehållshash i namnet.
+
+Kartgeometrin och storytelling-bilderna (även de som ritas på begäran) byter
+namn när innehållet ändras, så webbläsaren får spara dem i ett år utan att
+fråga servern igen. /prestanda.json ger svarstiderna från sidan Prestanda.
+"""
+from flask import Flask, jsonify, send_from_directory
+
+from backend.instrumentation import METRICS
+from backend.storytelling_assets import URL_PREFIX as STORY_URL_PREFIX, WEB_DIR as STORY_DIR
+from backend.storytelling_cache import CACHE_DIR as STORY_CACHE_DIR, URL_PREFIX as STORY_CACHE_URL_PREFIX
+from frontend.geometry import GEO_DIR, GEO_URL_PREFIX
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def send_immutable(directory, filename):
+    response = send_from_directory(directory.resolve(), filename, max_age=IMMUTABLE_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return response
+
+def create_app():
+    app = Flask(__name__)
+    app.add_url_rule(
+        f"/{GEO_URL_PREFIX}/<path:filename>", "geo",
+        lambda filename: send_immutable(GEO_DIR, filename)
+    )
+    app.add_url_rule(
+        f"/{STORY_URL_PREFIX}/<path:filename>", "storytelling",
+        lambda filename: send_immutable(STORY_DIR, filename)
+    )
+    app.add_url_rule(
+        f"/{STORY_CACHE_URL_PREFIX}/<path:filename>", "storytelling_cache",
+        lambda filename: send_immutable(STORY_CACHE_DIR, filename)
+    )
+    # Svarstidshistogram och senaste mätningar, för analys utanför appen
+    app.add_url_rule("/prestanda.json", "prestanda", lambda: jsonify(METRICS.snapshot()))
+    return app
@@ -1,19 +1,34 @@
+import time
+started = time.perf_counter()
+
 import pandas as pd
 import plotly.graph_objects as go
 from taipy.gui import Gui
 from backend.data_loader import load_all_data, load_studerande_data
-from backend.calculations import *
-from backend.callbacks import *
-from frontend.charts import *
-from frontend.map_charts import create_map
+from backend.cube import build_cube
+from backend.data_model import build_position_index
+from backend.calculations import build_examensgrad_matrix, examensgrad_years, get_examensgrad_selected, get_examensgrad_top5
+# Callbacks som sidorna anropar via on_change
+from backend.callbacks import update_anordnare_insights, update_dashboard, update_examensgrad, update_prestanda, update_story_charts, update_studerande
+from backend.page_state import SERVE_TIMER, first_page_jobs, on_navigate
+from backend.storytelling_assets import image_url
+from backend.storytelling_cache import start_render_pool
+from backend.warmup import WARMUP_ENABLED, start_warmup, warmup_jobs
+from frontend.charts import loading_figure, message_figure
+from frontend.static_files import create_app
 from frontend.pages.oversikt_page import oversikt_page
 from frontend.pages.karta_page import karta_page
 from frontend.pages.anordnare_page import anordnare_page
 from frontend.pages.storytelling_page import storytelling_page
 from frontend.pages.studerande_page import studerande_page
+from frontend.pages.prestanda_page import prestanda_page
 
 df = load_all_data()
-df_stud_filtered, omrade_list = load_studerande_data()
+cube = build_cube(df)
+df_index = build_position_index(df)
+cube_index = build_position_index(cube)
+stud_store, omrade_list = load_studerande_data()
+examensgrad_matrix = build_examensgrad_matrix(stud_store)
 
 years = ["Alla", "2024", "2023", "2022"]
 types = ["Alla", "Kurs", "Program"]
@@ -23,15 +38,19 @@ selected_year = "Alla"
 selected_type = "Alla"
 selected_anordnare = "Alla"
 
-total_ansokningar, antal_beviljade, godkand_procent, total_platser = calculate_kpis(df)
+# Platshållare - sidornas figurer räknas fram av on_navigate vid första besöket
+loaded_pages = []
+
+# "–" i stället för 0, så att sidan inte visar nollor innan siffrorna finns
+total_ansokningar, antal_beviljade, godkand_procent, total_platser = "–", "–", "–", "–"
 
-bar_chart = create_bar_chart(df)
-pie_chart = create_pie_chart(df)
-stacked_bar_chart = create_stacked_bar_chart(df)
-beslut_bar_chart = create_beslut_bar_chart(df)
-map_chart = create_map(df)
+bar_chart = loading_figure()
+pie_chart = loading_figure()
+stacked_bar_chart = loading_figure()
+beslut_bar_chart = loading_figure()
+map_chart = loading_figure()
 
-distribution_table = df.groupby(['Typ', 'År']).size().reset_index(name='Antal')
+distribution_table = df.groupby(['Typ', 'År'], observed=True).size().reset_index(name='Antal')
 table_description = "Visar hur ansökningarna är fördelade mellan kurser och program för varje år"
 
 selected_anordnare_insight = "Alla"
@@ -57,26 +76,58 @@ godkannande_comparison_chart = empty_fig
 ranking_chart = go.Figure(empty_fig)
 styrkor_chart = go.Figure(empty_fig)
 svagheter_chart = go.Figure(empty_fig)
+omrade_jamforelse_chart = go.Figure(empty_fig)
 
 selected_omrade = "Data/It"
+stud_years = examensgrad_years(examensgrad_matrix) or ["2024"]
+selected_stud_year = stud_years[0]
+kon_list = stud_store.labels('kön') or ["totalt"]
+alder_list = stud_store.labels('ålder') or ["totalt"]
+selected_kon = "totalt"
+selected_alder = "totalt"
+
+studerande_chart = loading_figure()
+examinerade_chart = loading_figure()
+comparison_chart = loading_figure()
+studerande_table = pd.DataFrame()
+examensgrad_top5 = get_examensgrad_top5(examensgrad_matrix, selected_stud_year)
+examensgrad_selected = get_examensgrad_selected(selected_omrade, examensgrad_matrix, selected_stud_year)
 
-studerande_chart = create_studerande_chart(selected_omrade, df_stud_filtered)
-examinerade_chart = create_examinerade_chart(selected_omrade)
-comparison_chart = create_comparison_chart(selected_omrade)
-studerande_table = create_studerande_table(selected_omrade, df_stud_filtered)
-examensgrad_top5 = get_examensgrad_top5()
-examensgrad_selected = get_examensgrad_selected(selected_omrade)
+story_omraden = list(df['Utbildningsområde'].cat.categories)
+story_omrade = "Data/IT"
+story_thresholds = ["5", "10", "20", "30"]
+story_threshold = "10"
+story_trend_image = image_url("storytelling_2_datait_trend")
+story_geo_image = image_url("storytelling_3_geographic_opportunity")
+story_status = ""
+
+# Fylls av update_prestanda när sidan öppnas
+prestanda_table = pd.DataFrame()
+prestanda_names = []
+prestanda_name = ""
+prestanda_chart = message_figure("Inga mätningar ännu")
+prestanda_cache_text = ""
 
 pages = {
     "Översikt": oversikt_page,
     "Studenttrender": studerande_page,
     "Karta": karta_page,
     "Anordnare": anordnare_page,
-    "Storytelling": storytelling_page
+    "Storytelling": storytelling_page,
+    "Prestanda": prestanda_page
 }
 
 if __name__ == "__main__":
-    Gui(pages=pages, css_file="assets/main.css").run(
+    if WARMUP_ENABLED:
+        jobs = warmup_jobs(df, df_index, cube, cube_index, years, types, selected_omrade, omrade_list, stud_store, examensgrad_matrix)
+    else:
+        jobs = first_page_jobs(cube, cube_index, selected_omrade, stud_store, examensgrad_matrix)
+    start_render_pool()
+    SERVE_TIMER.start(started)
+    print(f"Startklar efter {time.perf_counter() - started:.2f} s")
+    start_warmup(5005, jobs, started=started)
+
+    Gui(pages=pages, css_file="assets/main.css", flask=create_app()).run(
         port=5005,
         debug=True,
         dark_mode=False,